@@ -0,0 +1,515 @@
+# Offline load test for MusicBot, MusicPlayer and MusicFetcher.
+# Discord's gateway and voice connections and yt-dlp's network extraction are replaced with local stand-ins,
+# so it runs anywhere the bot's Python dependencies are installed. Usage:
+#   python bench/benchmark.py --guilds 2000 --concurrency 500 --latency 0.05 --json bench_output.txt
+import argparse
+import asyncio
+from dataclasses import replace
+import discord
+import json
+import logging
+import os
+import random
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from metrics import Histogram
+from music_bot import MusicBot
+
+
+SILENCE_PACKET = b"\xf8\xff\xfe"
+FRAMES_PER_SECOND = 50
+
+
+# ================================================================ #
+# YouTube Stand-Ins                                                #
+# ================================================================ #
+class FakeOpusAudio(discord.AudioSource):
+    def __init__(self, packet_count: int) -> None:
+        self.remaining = packet_count
+
+    def read(self) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        self.remaining -= 1
+        return SILENCE_PACKET
+
+    def is_opus(self) -> bool:
+        return True
+
+
+class FakeExtractor:
+    def __init__(self, latency: float, track_seconds: float) -> None:
+        self.latency = latency
+        self.track_seconds = track_seconds
+        self.extractions: int = 0
+
+    def make_info(self, video_id: str) -> dict:
+        return {
+            "id": video_id,
+            "title": f"Benchmark Track {video_id}",
+            "url": f"https://bench.invalid/{video_id}.webm?expire={int(time.time()) + 21600}",
+            "duration": self.track_seconds,
+            "acodec": "opus",
+            "abr": 128
+        }
+
+    # Called on the scheduler's worker threads, like the real extraction methods.
+    def extract_info(self, url: str) -> dict | None:
+        self.extractions += 1
+        time.sleep(self.latency)
+        return self.make_info(url.rsplit("=", 1)[-1])
+
+    def extract_search(self, query: str) -> list[dict]:
+        self.extractions += 1
+        time.sleep(self.latency)
+        return [{"id": f"search{abs(hash(query)) % 10 ** 6:06d}{index}", "title": f"{query} {index}"} for index in range(5)]
+
+    def extract_playlist(self, url: str, on_entry, stop_event) -> None:
+        self.extractions += 1
+        time.sleep(self.latency)
+        for index in range(10):
+            if stop_event.is_set():
+                break
+            on_entry({"id": f"playlist{index:05d}", "title": f"Playlist Track {index}", "duration": self.track_seconds})
+
+    def create_source(self, info: dict, start_position: float = 0.0) -> discord.AudioSource:
+        return FakeOpusAudio(int((self.track_seconds - start_position) * FRAMES_PER_SECOND))
+
+
+# ================================================================ #
+# Discord Stand-Ins                                                #
+# ================================================================ #
+class FakeVoiceClient:
+    def __init__(self, gateway: "FakeGateway", guild: "FakeGuild", channel: "FakeVoiceChannel") -> None:
+        self.gateway = gateway
+        self.guild = guild
+        self.channel = channel
+        self.source: discord.AudioSource | None = None
+        self.after = None
+        self.finish_handle: asyncio.TimerHandle | None = None
+        self.is_paused_flag: bool = False
+        self.is_connected_flag: bool = True
+        self.play_count: int = 0
+        self.play_waiters: list[tuple[int, asyncio.Future]] = []
+        self.disconnected = asyncio.Event()
+
+    def is_connected(self) -> bool:
+        return self.is_connected_flag
+
+    def is_playing(self) -> bool:
+        return self.source is not None and not self.is_paused_flag
+
+    def is_paused(self) -> bool:
+        return self.source is not None and self.is_paused_flag
+
+    def play(self, source: discord.AudioSource, after=None) -> None:
+        # The real player thread sends a packet every 20ms; here the track's packets are drained when it ends.
+        self.source = source
+        self.after = after
+        self.is_paused_flag = False
+        self.finish_handle = asyncio.get_running_loop().call_later(self.gateway.track_seconds, self.finish)
+        self.play_count += 1
+        for waiter in [waiter for waiter in self.play_waiters if waiter[0] <= self.play_count]:
+            self.play_waiters.remove(waiter)
+            if not waiter[1].done():
+                waiter[1].set_result(None)
+
+    def finish(self) -> None:
+        source, after = self.source, self.after
+        if self.finish_handle:
+            self.finish_handle.cancel()
+        self.source = self.after = self.finish_handle = None
+        if not source:
+            return
+
+        while source.read():
+            pass
+        source.cleanup()
+        if after:
+            after(None)
+
+    def stop(self) -> None:
+        self.finish()
+
+    def pause(self) -> None:
+        self.is_paused_flag = True
+
+    def resume(self) -> None:
+        self.is_paused_flag = False
+
+    async def wait_for_plays(self, count: int, timeout: float) -> None:
+        if self.play_count >= count:
+            return
+        future = asyncio.get_running_loop().create_future()
+        self.play_waiters.append((count, future))
+        await asyncio.wait_for(future, timeout)
+
+    async def move_to(self, channel: "FakeVoiceChannel") -> None:
+        before = self.channel
+        self.channel = channel
+        await self.gateway.update_voice_state(self.gateway.bot_member(self.guild), before, channel)
+
+    async def disconnect(self, force: bool = False) -> None:
+        if not self.is_connected_flag:
+            return
+        self.stop()
+        self.is_connected_flag = False
+        self.guild.voice_client = None
+        await self.gateway.update_voice_state(self.gateway.bot_member(self.guild), self.channel, None)
+        self.disconnected.set()
+
+
+class FakeTextChannel:
+    def __init__(self, gateway: "FakeGateway", channel_id: int) -> None:
+        self.gateway = gateway
+        self.id = channel_id
+
+    async def send(self, content: str | None = None, **kwargs) -> None:
+        self.gateway.messages_sent += 1
+
+
+class FakeVoiceChannel:
+    def __init__(self, gateway: "FakeGateway", guild: "FakeGuild", channel_id: int) -> None:
+        self.gateway = gateway
+        self.guild = guild
+        self.id = channel_id
+        self.members: list[SimpleNamespace] = []
+
+    def permissions_for(self, member: SimpleNamespace) -> SimpleNamespace:
+        return SimpleNamespace(connect=True, speak=True)
+
+    async def connect(self) -> FakeVoiceClient:
+        await asyncio.sleep(self.gateway.connect_latency)
+        voice_client = FakeVoiceClient(self.gateway, self.guild, self)
+        self.guild.voice_client = voice_client
+        await self.gateway.update_voice_state(self.gateway.bot_member(self.guild), None, self)
+        return voice_client
+
+
+class FakeGuild:
+    def __init__(self, gateway: "FakeGateway", guild_id: int) -> None:
+        self.id = guild_id
+        self.shard_id = 0
+        self.voice_client: FakeVoiceClient | None = None
+        self.me = SimpleNamespace(id=gateway.bot_user.id, bot=True, guild=self, voice=None)
+        self.voice_channel = FakeVoiceChannel(gateway, self, guild_id * 10 + 1)
+        self.text_channel = FakeTextChannel(gateway, guild_id * 10 + 2)
+
+
+class FakeResponse:
+    def __init__(self, gateway: "FakeGateway") -> None:
+        self.gateway = gateway
+        self.done: bool = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def defer(self, **kwargs) -> None:
+        self.done = True
+
+    async def send_message(self, content: str | None = None, **kwargs) -> None:
+        self.done = True
+        self.gateway.messages_sent += 1
+
+    async def edit_message(self, **kwargs) -> None:
+        self.done = True
+
+
+class FakeFollowup:
+    def __init__(self, gateway: "FakeGateway") -> None:
+        self.gateway = gateway
+
+    async def send(self, content: str | None = None, **kwargs) -> None:
+        self.gateway.messages_sent += 1
+
+
+class FakeInteraction:
+    def __init__(self, gateway: "FakeGateway", guild: FakeGuild, user: SimpleNamespace) -> None:
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.channel = guild.text_channel
+        self.response = FakeResponse(gateway)
+        self.followup = FakeFollowup(gateway)
+
+    def is_expired(self) -> bool:
+        return False
+
+
+class FakeGateway:
+    def __init__(self, track_seconds: float, connect_latency: float) -> None:
+        self.bot: "BenchBot | None" = None
+        self.bot_user = SimpleNamespace(id=1, bot=True)
+        self.track_seconds = track_seconds
+        self.connect_latency = connect_latency
+        self.guilds: dict[int, FakeGuild] = {}
+        self.channels: dict[int, FakeTextChannel] = {}
+        self.messages_sent: int = 0
+
+    def add_guild(self, guild_id: int) -> FakeGuild:
+        guild = FakeGuild(self, guild_id)
+        self.guilds[guild_id] = guild
+        self.channels[guild.text_channel.id] = guild.text_channel
+        return guild
+
+    def bot_member(self, guild: FakeGuild) -> SimpleNamespace:
+        return guild.me
+
+    # Mirrors discord.py, which updates its member cache before dispatching the event.
+    async def update_voice_state(self, member: SimpleNamespace, before: FakeVoiceChannel | None, after: FakeVoiceChannel | None) -> None:
+        if before and member in before.members:
+            before.members.remove(member)
+        if after:
+            after.members.append(member)
+        member.voice = SimpleNamespace(channel=after) if after else None
+        await self.bot.on_voice_state_update(member, SimpleNamespace(channel=before), SimpleNamespace(channel=after))
+
+
+class BenchBot(MusicBot):
+    def __init__(self, gateway: FakeGateway) -> None:
+        super().__init__()
+        self.gateway = gateway
+        gateway.bot = self
+
+    @property
+    def user(self) -> SimpleNamespace:
+        return self.gateway.bot_user
+
+    @property
+    def voice_clients(self) -> list[FakeVoiceClient]:
+        return [guild.voice_client for guild in self.gateway.guilds.values() if guild.voice_client]
+
+    def get_guild(self, guild_id: int) -> FakeGuild | None:
+        return self.gateway.guilds.get(guild_id)
+
+    def get_channel(self, channel_id: int) -> FakeTextChannel | None:
+        return self.gateway.channels.get(channel_id)
+
+    async def wait_until_ready(self) -> None:
+        return
+
+
+# ================================================================ #
+# Scenario                                                         #
+# ================================================================ #
+class Benchmark:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.gateway = FakeGateway(args.track_seconds, args.connect_latency)
+        self.extractor = FakeExtractor(args.latency, args.track_seconds)
+        self.bot = BenchBot(self.gateway)
+        self.command_timings: dict[str, Histogram] = {}
+        self.commands: int = 0
+        self.failures: int = 0
+        self.loop_lag = Histogram(max_samples=100000)
+        self.peak_players: int = 0
+        self.peak_memory: int = 0
+        self.memory_per_player: float = 0.0
+        self.baseline_memory: int = 0
+
+    def setup(self) -> None:
+        bot = self.bot
+        bot.loop = asyncio.get_running_loop()
+        bot.configure()
+        bot.player_options = replace(bot.player_options, idle_disconnect_delay=self.args.idle_delay)
+        bot.stage_timings.max_samples = max(bot.stage_timings.max_samples, self.args.guilds * 2)
+
+        music_fetcher = bot.music_fetcher
+        music_fetcher.extract_info = self.extractor.extract_info
+        music_fetcher.extract_search = self.extractor.extract_search
+        music_fetcher.extract_playlist = self.extractor.extract_playlist
+        music_fetcher.create_source = self.extractor.create_source
+        music_fetcher.audio_cache = None
+
+    async def run_command(self, name: str, callback, *args) -> None:
+        start = time.perf_counter()
+        try:
+            await callback(*args)
+        except Exception as e:
+            self.failures += 1
+            logging.getLogger(__name__).exception(e)
+        finally:
+            histogram = self.command_timings.setdefault(name, Histogram(max_samples=self.args.guilds * 2))
+            histogram.observe(time.perf_counter() - start)
+            self.commands += 1
+
+    def get_track_url(self) -> str:
+        return f"https://www.youtube.com/watch?v=bench{self.random.randrange(self.args.catalog):06d}"
+
+    async def run_session(self, guild_id: int) -> None:
+        bot = self.bot
+        guild = self.gateway.add_guild(guild_id)
+        member = SimpleNamespace(id=guild_id * 10 + 3, bot=False, guild=guild, voice=None)
+        await self.gateway.update_voice_state(member, None, guild.voice_channel)
+
+        def interaction() -> FakeInteraction:
+            return FakeInteraction(self.gateway, guild, member)
+
+        timeout = self.args.timeout
+        if self.random.random() < self.args.search_ratio:
+            query = f"benchmark song {self.random.randrange(self.args.catalog)}"
+        else:
+            query = self.get_track_url()
+        await self.run_command("play", bot.play_command, interaction(), query)
+        await self.run_command("queue", bot.queue_command, interaction())
+        if not guild.voice_client:
+            self.failures += 1
+            return
+
+        try:
+            await guild.voice_client.wait_for_plays(1, timeout)
+            await self.run_command("play", bot.play_command, interaction(), self.get_track_url())
+            await self.run_command("queue", bot.queue_command, interaction())
+            await self.run_command("skip", bot.skip_command, interaction())
+            await guild.voice_client.wait_for_plays(2, timeout)
+        except asyncio.TimeoutError:
+            self.failures += 1
+
+        # The last listener leaving starts the idle disconnect, which tears the player down.
+        voice_client = guild.voice_client
+        await self.gateway.update_voice_state(member, guild.voice_channel, None)
+        if voice_client:
+            try:
+                await asyncio.wait_for(voice_client.disconnected.wait(), self.args.idle_delay + timeout)
+            except asyncio.TimeoutError:
+                self.failures += 1
+
+    async def sample(self, interval: float) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lag.observe(max(0.0, time.perf_counter() - start - interval))
+
+            player_count = len(self.bot.music_players)
+            if tracemalloc.is_tracing():
+                memory = tracemalloc.get_traced_memory()[0] - self.baseline_memory
+                self.peak_memory = max(self.peak_memory, memory)
+                # Sampled at the most concurrent players, where fixed costs such as caches are spread thinnest.
+                if player_count and player_count >= self.peak_players:
+                    self.memory_per_player = memory / player_count
+            self.peak_players = max(self.peak_players, player_count)
+
+    async def run(self) -> dict:
+        self.setup()
+        if self.args.memory:
+            tracemalloc.start()
+            self.baseline_memory = tracemalloc.get_traced_memory()[0]
+
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+
+        async def limited_session(guild_id: int) -> None:
+            async with semaphore:
+                await self.run_session(guild_id)
+
+        sampler = asyncio.create_task(self.sample(self.args.lag_interval))
+        start = time.perf_counter()
+        await asyncio.gather(*(limited_session(1000 + index) for index in range(self.args.guilds)))
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        await self.shutdown()
+        return self.build_report(elapsed)
+
+    async def shutdown(self) -> None:
+        bot = self.bot
+        for task in bot.idle_disconnect_tasks.values():
+            task.cancel()
+        for guild_id in list(bot.music_players):
+            await bot.delete_music_player(guild_id)
+        bot.music_fetcher.close()
+
+    def build_report(self, elapsed: float) -> dict:
+        stage_summary = self.bot.stage_timings.get_summary()
+        lag_quantiles = self.loop_lag.get_quantiles()
+        commands = {}
+        for name, histogram in sorted(self.command_timings.items()):
+            quantiles = histogram.get_quantiles()
+            commands[name] = {"count": histogram.count, "p50": quantiles[0.5], "p95": quantiles[0.95], "p99": quantiles[0.99]}
+
+        return {
+            "guilds": self.args.guilds,
+            "concurrency": self.args.concurrency,
+            "latency": self.args.latency,
+            "elapsed": elapsed,
+            "sessions_per_second": self.args.guilds / elapsed,
+            "commands_per_second": self.commands / elapsed,
+            "failures": self.failures,
+            "extractions": self.extractor.extractions,
+            "messages_sent": self.gateway.messages_sent,
+            "time_to_play": stage_summary.get("time_to_play", {}),
+            "stages": stage_summary,
+            "commands": commands,
+            "loop_lag": {"p50": lag_quantiles[0.5], "p95": lag_quantiles[0.95], "p99": lag_quantiles[0.99], "max": max(self.loop_lag.samples, default=0.0)},
+            "peak_players": self.peak_players,
+            "leftover_players": len(self.bot.music_players),
+            "peak_memory_bytes": self.peak_memory,
+            "memory_per_player_bytes": self.memory_per_player
+        }
+
+
+# ================================================================ #
+# Entry Point                                                      #
+# ================================================================ #
+def format_report(report: dict) -> str:
+    def milliseconds(summary: dict, key: str) -> str:
+        return f"{summary.get(key, 0.0) * 1000:.1f}ms"
+
+    time_to_play = report["time_to_play"]
+    loop_lag = report["loop_lag"]
+    lines = [
+        f"Guilds: {report['guilds']} (concurrency {report['concurrency']}, extraction latency {report['latency'] * 1000:.0f}ms)",
+        f"Elapsed: {report['elapsed']:.2f}s, failures: {report['failures']}",
+        f"Throughput: {report['sessions_per_second']:.1f} sessions/s, {report['commands_per_second']:.1f} commands/s",
+        f"Time to play: p50={milliseconds(time_to_play, 'p50')} p95={milliseconds(time_to_play, 'p95')} p99={milliseconds(time_to_play, 'p99')} (n={time_to_play.get('count', 0)})",
+        f"Loop lag: p50={milliseconds(loop_lag, 'p50')} p95={milliseconds(loop_lag, 'p95')} p99={milliseconds(loop_lag, 'p99')} max={milliseconds(loop_lag, 'max')}",
+        f"Players: peak {report['peak_players']}, left over {report['leftover_players']}"
+    ]
+    if report["peak_memory_bytes"]:
+        lines.append(f"Memory: peak {report['peak_memory_bytes'] / 1024 / 1024:.1f}MiB, {report['memory_per_player_bytes'] / 1024:.1f}KiB per active player")
+    for name, summary in report["commands"].items():
+        lines.append(f"Command {name}: count={summary['count']} p50={milliseconds(summary, 'p50')} p95={milliseconds(summary, 'p95')} p99={milliseconds(summary, 'p99')}")
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline load test for Joe's Music Bot.")
+    parser.add_argument("--guilds", type=int, default=1000, help="Simulated guilds, each running one session.")
+    parser.add_argument("--concurrency", type=int, default=250, help="Sessions running at once.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds each stub extraction takes.")
+    parser.add_argument("--connect-latency", type=float, default=0.01, help="Seconds each voice connection takes.")
+    parser.add_argument("--track-seconds", type=float, default=2.0, help="Length of each simulated track.")
+    parser.add_argument("--idle-delay", type=float, default=0.5, help="Idle disconnect delay after the listener leaves.")
+    parser.add_argument("--catalog", type=int, default=200, help="Distinct videos sessions pick from.")
+    parser.add_argument("--search-ratio", type=float, default=0.2, help="Fraction of sessions that start with a search.")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds to wait for playback before counting a failure.")
+    parser.add_argument("--lag-interval", type=float, default=0.05, help="Event loop lag sampling interval.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Skip tracemalloc, which slows the run.")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    # Voice dependencies are not needed with the fake voice client.
+    logging.getLogger("discord.client").setLevel(logging.ERROR)
+    report = asyncio.run(Benchmark(args).run())
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    if report["failures"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
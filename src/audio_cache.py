@@ -0,0 +1,135 @@
+import asyncio
+from collections import OrderedDict
+import os
+import re
+import shlex
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+VIDEO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{11}$")
+
+
+class AudioCache:
+    def __init__(self, directory_path: str, max_bytes: int, max_duration: float, bitrate: int, max_concurrent_writes: int) -> None:
+        self.directory_path = directory_path
+        self.max_bytes = max_bytes
+        self.max_duration = max_duration
+        self.bitrate = bitrate
+        self.entries: OrderedDict[str, int] = OrderedDict()
+        self.total_bytes: int = 0
+        self.write_tasks: dict[str, asyncio.Task] = {}
+        self.active_writes: int = 0
+        self.write_semaphore = asyncio.Semaphore(max_concurrent_writes)
+        self.load()
+
+    def get_file_path(self, video_id: str) -> str:
+        return f"{self.directory_path}/{video_id}.opus"
+
+    def load(self) -> None:
+        os.makedirs(self.directory_path, exist_ok=True)
+
+        files = []
+        for entry in os.scandir(self.directory_path):
+            if entry.name.endswith(".tmp"):
+                os.remove(entry.path)
+                continue
+            if entry.name.endswith(".opus") and entry.is_file():
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name.removesuffix(".opus"), stat.st_size))
+
+        for _, video_id, size in sorted(files):
+            self.entries[video_id] = size
+            self.total_bytes += size
+
+        self.evict()
+
+    # ================================================================ #
+    # Lookup                                                           #
+    # ================================================================ #
+    def get(self, video_id: str) -> str | None:
+        if video_id not in self.entries:
+            return None
+
+        file_path = self.get_file_path(video_id)
+        if not os.path.exists(file_path):
+            self.total_bytes -= self.entries.pop(video_id)
+            return None
+
+        self.entries.move_to_end(video_id)
+        os.utime(file_path)
+        return file_path
+
+    # ================================================================ #
+    # Writing                                                          #
+    # ================================================================ #
+    def store(self, info: dict, before_options: str) -> None:
+        video_id = info.get("id")
+        source_url = info.get("url")
+        if not video_id or not source_url or not VIDEO_ID_PATTERN.match(video_id):
+            return
+
+        if info.get("is_live") or (info.get("duration") or 0) > self.max_duration:
+            return
+
+        if video_id in self.entries or video_id in self.write_tasks:
+            return
+
+        task = asyncio.create_task(self.write(video_id, source_url, info.get("acodec"), before_options), name=f"AudioCache_{video_id}")
+        self.write_tasks[video_id] = task
+        task.add_done_callback(lambda _: self.write_tasks.pop(video_id, None))
+
+    async def write(self, video_id: str, source_url: str, acodec: str | None, before_options: str) -> None:
+        file_path = self.get_file_path(video_id)
+        temp_file_path = f"{file_path}.tmp"
+        if acodec == "opus":
+            codec_args = ["-c:a", "copy"]
+        else:
+            codec_args = ["-c:a", "libopus", "-b:a", f"{self.bitrate}k", "-ar", "48000", "-ac", "2"]
+        args = [
+            "ffmpeg", *shlex.split(before_options), "-i", source_url,
+            "-vn", "-map_metadata", "-1", *codec_args, "-f", "opus", "-y", temp_file_path
+        ]
+
+        async with self.write_semaphore:
+            process = None
+            self.active_writes += 1
+            try:
+                process = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+                _, stderr = await process.communicate()
+                if process.returncode != 0:
+                    logger.error(f"Failed to cache {video_id}: {stderr.decode(errors='replace').strip()}")
+                    return
+
+                os.replace(temp_file_path, file_path)
+            except asyncio.CancelledError:
+                if process and process.returncode is None:
+                    process.kill()
+                raise
+            except Exception as e:
+                logger.exception(e)
+                return
+            finally:
+                self.active_writes -= 1
+                if os.path.exists(temp_file_path):
+                    os.remove(temp_file_path)
+
+        size = os.path.getsize(file_path)
+        self.entries[video_id] = size
+        self.total_bytes += size
+        self.evict()
+
+    def evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self.entries:
+            video_id, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self.get_file_path(video_id))
+            except FileNotFoundError:
+                pass
+
+    def close(self) -> None:
+        for task in self.write_tasks.values():
+            task.cancel()
+        self.write_tasks.clear()
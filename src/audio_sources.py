@@ -0,0 +1,126 @@
+import asyncio
+import discord
+from discord.oggparse import OggStream
+import mmap
+import threading
+from typing import Callable
+
+
+class CachedOpusAudio(discord.AudioSource):
+    def __init__(self, path: str) -> None:
+        self.file = open(path, "rb")
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.packets = OggStream(self.mmap).iter_packets()
+
+    def read(self) -> bytes:
+        return next(self.packets, b"")
+
+    def is_opus(self) -> bool:
+        return True
+
+    def cleanup(self) -> None:
+        if not self.mmap.closed:
+            self.mmap.close()
+        if not self.file.closed:
+            self.file.close()
+
+
+class BufferedOpusAudio(discord.AudioSource):
+    def __init__(self, frames: list[bytes]) -> None:
+        self.frames = iter(frames)
+
+    def read(self) -> bytes:
+        return next(self.frames, b"")
+
+    def is_opus(self) -> bool:
+        return True
+
+
+class RecordingOpusAudio(discord.AudioSource):
+    def __init__(self, source: discord.AudioSource, max_bytes: int) -> None:
+        self.source = source
+        self.max_bytes = max_bytes
+        self.frames: list[bytes] | None = []
+        self.size: int = 0
+        self.is_complete: bool = False
+
+    def read(self) -> bytes:
+        packet = self.source.read()
+        if not packet:
+            self.is_complete = True
+            return packet
+
+        if self.frames is not None:
+            self.size += len(packet)
+            if self.size > self.max_bytes:
+                self.frames = None
+            else:
+                self.frames.append(packet)
+        return packet
+
+    def is_opus(self) -> bool:
+        return self.source.is_opus()
+
+    def cleanup(self) -> None:
+        self.source.cleanup()
+
+
+class TrackedAudio(discord.AudioSource):
+    def __init__(self, source: discord.AudioSource, on_first_packet: Callable[[], None] | None = None, start_position: float = 0.0, is_streamed: bool = False) -> None:
+        self.source = source
+        self.on_first_packet = on_first_packet
+        self.start_position = start_position
+        self.is_streamed = is_streamed
+        self.packet_count: int = 0
+        self.is_priming: bool = False
+        self.primed_packet: bytes = b""
+        self.primed_event = threading.Event()
+
+    @property
+    def position(self) -> float:
+        return self.start_position + self.packet_count * discord.opus.Encoder.FRAME_LENGTH / 1000
+
+    async def prime(self, timeout: float) -> bool:
+        # The first packet is read ahead so playback starts the moment FFmpeg has audio, not after a fixed delay.
+        self.is_priming = True
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.to_thread(self.prime_packet)), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def prime_packet(self) -> None:
+        try:
+            self.primed_packet = self.read_source()
+        finally:
+            self.primed_event.set()
+
+    def read_source(self) -> bytes:
+        packet = self.source.read()
+        if packet:
+            self.packet_count += 1
+        if self.on_first_packet:
+            self.on_first_packet()
+            self.on_first_packet = None
+        return packet
+
+    def read(self) -> bytes:
+        if self.is_priming:
+            # A slow prime may still be running; wait for it rather than reading the pipe concurrently.
+            self.primed_event.wait()
+            self.is_priming = False
+            packet, self.primed_packet = self.primed_packet, b""
+            return packet
+        return self.read_source()
+
+    def is_opus(self) -> bool:
+        return self.source.is_opus()
+
+    def cleanup(self) -> None:
+        self.source.cleanup()
+
+
+def unwrap_source(source: discord.AudioSource) -> discord.AudioSource:
+    while isinstance(source, (RecordingOpusAudio, TrackedAudio)):
+        source = source.source
+    return source
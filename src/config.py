@@ -0,0 +1,375 @@
+import asyncio
+from dataclasses import dataclass, field, fields, is_dataclass
+import os
+import types
+from typing import Callable, Union, get_args, get_origin
+import yaml
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_FILE_NAMES = {
+    "bot": "bot_config.yaml",
+    "music": "music_config.yaml",
+    "logger": "logger_config.yaml"
+}
+NUMBER = (int, float)
+POSITIVE = {"positive": True}
+
+
+class ConfigError(ValueError):
+    pass
+
+
+# ================================================================ #
+# Bot Options                                                      #
+# ================================================================ #
+@dataclass(frozen=True)
+class Messages:
+    error_command: str = "Something went wrong while running your command."
+    error_download: str = "I couldn't find that video."
+    error_interaction: str = "Invalid interaction."
+    error_invalid_url: str = "That isn't a YouTube video or playlist URL."
+    error_permissions: str = "I don't have permission to do that."
+    error_playlist: str = "I couldn't find that playlist."
+    error_search: str = "I couldn't find anything for that search."
+    error_source: str = "I couldn't find an audio source for that video."
+    error_unknown: str = "An unknown error occurred."
+    event_bot_voiceless: str = "I'm not in a voice channel."
+    event_leave: str = "Bye."
+    event_looping_disabled: str = "Looping disabled."
+    event_looping_enabled: str = "Looping enabled."
+    event_not_paused: str = "I'm not paused."
+    event_not_playing: str = "I'm not playing anything."
+    event_play: str = "Working..."
+    event_queue_cleared: str = "Queue cleared."
+    event_queue_empty: str = "The queue is empty."
+    event_track_paused: str = "Paused."
+    event_track_resumed: str = "Resumed."
+    event_track_skipped: str = "Skipped."
+    event_user_voiceless: str = "You're not in a voice channel."
+    help: str = "I can't help you."
+
+
+@dataclass(frozen=True)
+class PlayerOptions:
+    prefetch_depth: int = 2
+    warm_ffmpeg: bool = True
+    loop_buffer_max_mb: float = 8
+    idle_disconnect_delay: float = 30
+    queue_page_size: int = field(default=10, metadata=POSITIVE)
+    title_index_size: int = field(default=5000, metadata=POSITIVE)
+    max_stream_retries: int = 2
+    stream_end_tolerance: float = 5
+    ready_timeout: float = 5
+    idle_player_timeout: float = 600
+    idle_player_check_interval: float = field(default=60, metadata=POSITIVE)
+
+
+@dataclass(frozen=True)
+class MetricsOptions:
+    summary_interval: float = 300
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = 9090
+    loop_lag_interval: float = field(default=1, metadata=POSITIVE)
+
+
+@dataclass(frozen=True)
+class ShardingOptions:
+    shard_count: int = field(default=1, metadata=POSITIVE)
+    processes: int = field(default=1, metadata=POSITIVE)
+    restart_delay: float = 5
+
+
+@dataclass(frozen=True)
+class QueueStoreOptions:
+    enabled: bool = True
+    directory_name: str = "data"
+    file_name: str = "queues.sqlite3"
+    flush_interval: float = field(default=5, metadata=POSITIVE)
+
+
+@dataclass(frozen=True)
+class CommandSyncOptions:
+    directory_name: str = "data"
+    file_name: str = "command_tree.sha256"
+    force: bool = False
+
+
+@dataclass(frozen=True)
+class ConfigOptions:
+    hot_reload: bool = False
+    reload_interval: float = field(default=5, metadata=POSITIVE)
+
+
+@dataclass(frozen=True)
+class BotConfig:
+    messages: Messages = field(default_factory=Messages)
+    player_options: PlayerOptions = field(default_factory=PlayerOptions)
+    metrics_options: MetricsOptions = field(default_factory=MetricsOptions)
+    sharding_options: ShardingOptions = field(default_factory=ShardingOptions)
+    queue_store_options: QueueStoreOptions = field(default_factory=QueueStoreOptions)
+    command_sync_options: CommandSyncOptions = field(default_factory=CommandSyncOptions)
+    config_options: ConfigOptions = field(default_factory=ConfigOptions)
+
+
+# ================================================================ #
+# Music Options                                                    #
+# ================================================================ #
+@dataclass(frozen=True)
+class FfmpegOptions:
+    before_options: str = ""
+    options: str = ""
+
+
+@dataclass(frozen=True)
+class InfoCacheOptions:
+    max_size: int = field(default=512, metadata=POSITIVE)
+    ttl: float = 3600
+    expiry_margin: float = 300
+    failure_ttl: float = 300
+    refresh_margin: float = 1800
+
+
+@dataclass(frozen=True)
+class ExtractionOptions:
+    workers: int = field(default=4, metadata=POSITIVE)
+
+
+@dataclass(frozen=True)
+class YoutubeDLPoolOptions:
+    # None gives one instance per extraction worker.
+    size: int | None = field(default=None, metadata=POSITIVE)
+    max_uses: int = field(default=100, metadata=POSITIVE)
+
+
+@dataclass(frozen=True)
+class PlaylistOptions:
+    limit: int = 500
+    pool_size: int = field(default=2, metadata=POSITIVE)
+    ydl_options: dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class AudioCacheOptions:
+    enabled: bool = False
+    directory_name: str = "cache"
+    max_size_mb: float = 1024
+    max_duration: float = 900
+    bitrate: int = field(default=128, metadata=POSITIVE)
+    max_concurrent_writes: int = field(default=2, metadata=POSITIVE)
+
+
+@dataclass(frozen=True)
+class SearchOptions:
+    limit: int = field(default=5, metadata=POSITIVE)
+    interval: float = 0.5
+    cache_size: int = field(default=1024, metadata=POSITIVE)
+    cache_ttl: float = 3600
+    max_pending: int = field(default=8, metadata=POSITIVE)
+
+
+@dataclass(frozen=True)
+class TranscodingProfile:
+    bitrate: int = field(default=128, metadata=POSITIVE)
+    threads: int = field(default=1, metadata=POSITIVE)
+    low_cpu: bool = False
+
+
+@dataclass(frozen=True)
+class TranscodingOptions:
+    passthrough: bool = True
+    passthrough_max_bitrate: float = 192
+    profile: str = "balanced"
+    profiles: dict[str, TranscodingProfile] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class MusicConfig:
+    ydl_options: dict = field(default_factory=dict)
+    ffmpeg_options: FfmpegOptions = field(default_factory=FfmpegOptions)
+    info_cache: InfoCacheOptions = field(default_factory=InfoCacheOptions)
+    extraction: ExtractionOptions = field(default_factory=ExtractionOptions)
+    ydl_pool: YoutubeDLPoolOptions = field(default_factory=YoutubeDLPoolOptions)
+    playlist_options: PlaylistOptions = field(default_factory=PlaylistOptions)
+    audio_cache: AudioCacheOptions = field(default_factory=AudioCacheOptions)
+    search_options: SearchOptions = field(default_factory=SearchOptions)
+    transcoding_options: TranscodingOptions = field(default_factory=TranscodingOptions)
+
+
+# ================================================================ #
+# Logger Options                                                   #
+# ================================================================ #
+@dataclass(frozen=True)
+class LoggerConfig:
+    directory_name: str = "logs"
+    file_name: str = "logs.txt"
+    format: str = "[%(asctime)s][%(levelname)s] %(message)s"
+    json: bool = False
+    max_bytes: int = 10 * 1024 * 1024
+    backup_count: int = 5
+    queue_size: int = 10000
+    rate_limit_interval: float = 10
+
+
+# ================================================================ #
+# Process Identity                                                 #
+# ================================================================ #
+@dataclass(frozen=True)
+class ProcessIdentity:
+    # Set by the launcher; a process started on its own runs every shard as process 0 of 1.
+    is_launched: bool = False
+    index: int = 0
+    count: int = 1
+    shard_ids: tuple[int, ...] | None = None
+    shard_count: int | None = None
+
+
+@dataclass(frozen=True)
+class Config:
+    bot: BotConfig
+    music: MusicConfig
+    logger: LoggerConfig
+    process: ProcessIdentity
+    modified_times: dict[str, float]
+
+
+SECTION_TYPES = {"bot": BotConfig, "music": MusicConfig, "logger": LoggerConfig}
+current_config: Config | None = None
+
+
+# ================================================================ #
+# Loading                                                          #
+# ================================================================ #
+def get_config_file_path(name: str) -> str:
+    return f"{ROOT}/config/{CONFIG_FILE_NAMES[name]}"
+
+
+def get_modified_times() -> dict[str, float]:
+    return {name: os.path.getmtime(get_config_file_path(name)) for name in CONFIG_FILE_NAMES}
+
+
+def load_config() -> Config:
+    modified_times = get_modified_times()
+    sections = {}
+    for name, file_name in CONFIG_FILE_NAMES.items():
+        file_path = get_config_file_path(name)
+        try:
+            with open(file_path, "r") as f:
+                section = yaml.safe_load(f)
+        except (OSError, yaml.YAMLError) as e:
+            raise ConfigError(f"{file_path}: {e}") from e
+
+        if section is None:
+            section = {}
+        if not isinstance(section, dict):
+            raise ConfigError(f"{file_name}: expected a mapping at the top level.")
+        sections[name] = parse_section(file_name, "", section, SECTION_TYPES[name])
+
+    check_music_config(CONFIG_FILE_NAMES["music"], sections["music"])
+    return Config(process=get_process_identity(), modified_times=modified_times, **sections)
+
+
+def get_process_identity() -> ProcessIdentity:
+    process_index = os.getenv("JMB_PROCESS_INDEX")
+    shard_ids = os.getenv("JMB_SHARD_IDS")
+    shard_count = os.getenv("JMB_SHARD_COUNT")
+    try:
+        return ProcessIdentity(
+            is_launched=process_index is not None,
+            index=int(process_index or 0),
+            count=int(os.getenv("JMB_PROCESS_COUNT", "1")),
+            shard_ids=tuple(int(shard_id) for shard_id in shard_ids.split(",")) if shard_ids else None,
+            shard_count=int(shard_count) if shard_count else None
+        )
+    except ValueError as e:
+        raise ConfigError(f"Invalid process environment: {e}") from e
+
+
+def parse_section(file_name: str, path: str, values: object, section_type: type) -> object:
+    # Keys the code doesn't read are ignored; a missing or null key keeps the dataclass default.
+    if not isinstance(values, dict):
+        raise ConfigError(f"{file_name}: {path} should be a mapping, not {type(values).__name__}.")
+
+    options = {}
+    for option in fields(section_type):
+        value = values.get(option.name)
+        if value is None:
+            continue
+        option_path = f"{path}.{option.name}" if path else option.name
+        options[option.name] = parse_value(file_name, option_path, value, option.type, option.metadata.get("positive", False))
+    return section_type(**options)
+
+
+def parse_value(file_name: str, path: str, value: object, value_type: object, is_positive: bool = False) -> object:
+    if get_origin(value_type) in (Union, types.UnionType):
+        value_type = next(arg for arg in get_args(value_type) if arg is not type(None))
+
+    if is_dataclass(value_type):
+        return parse_section(file_name, path, value, value_type)
+
+    if get_origin(value_type) is dict:
+        if not isinstance(value, dict):
+            raise ConfigError(f"{file_name}: {path} should be a mapping, not {type(value).__name__}.")
+        item_type = get_args(value_type)[1]
+        return {key: parse_value(file_name, f"{path}.{key}", item, item_type) for key, item in value.items() if item is not None}
+
+    accepted_type = NUMBER if value_type is float else value_type
+    # YAML booleans are ints to isinstance, so a flag given where a number belongs is rejected explicitly.
+    if not isinstance(value, accepted_type) or (isinstance(value, bool) and value_type is not bool):
+        type_name = {float: "a number", dict: "a mapping"}.get(value_type, value_type.__name__)
+        raise ConfigError(f"{file_name}: {path} should be {type_name}, not {type(value).__name__}.")
+
+    if isinstance(value, bool) or not isinstance(value, NUMBER):
+        return value
+    if is_positive and value <= 0:
+        raise ConfigError(f"{file_name}: {path} must be positive.")
+    if value < 0:
+        raise ConfigError(f"{file_name}: {path} must not be negative.")
+    return value
+
+
+def check_music_config(file_name: str, music: MusicConfig) -> None:
+    # Scheduler workers each lease an instance, so a smaller pool would leave workers blocked waiting for one.
+    workers = music.extraction.workers
+    if music.ydl_pool.size is not None and music.ydl_pool.size < workers:
+        raise ConfigError(f"{file_name}: ydl_pool.size must be at least extraction.workers ({workers}).")
+
+    transcoding_options = music.transcoding_options
+    profiles = transcoding_options.profiles
+    if profiles and transcoding_options.profile not in profiles:
+        raise ConfigError(f"{file_name}: transcoding_options.profile is not one of {', '.join(profiles)}.")
+
+
+# ================================================================ #
+# Access                                                           #
+# ================================================================ #
+def get_config() -> Config:
+    global current_config
+    if current_config is None:
+        current_config = load_config()
+    return current_config
+
+
+async def watch_config(interval: float, on_reload: Callable[[Config], None]) -> None:
+    global current_config
+    modified_times = get_config().modified_times
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            latest_modified_times = get_modified_times()
+            if latest_modified_times == modified_times:
+                continue
+            modified_times = latest_modified_times
+            config = await asyncio.to_thread(load_config)
+        except (OSError, ConfigError) as e:
+            # The previous config stays in effect until the files change again.
+            logger.error(f"Config reload failed: {e}")
+            continue
+
+        current_config = config
+        logger.info("Config reloaded.")
+        on_reload(config)
@@ -0,0 +1,157 @@
+import asyncio
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import IntEnum
+import time
+from typing import Any, Callable
+
+from metrics import Histogram
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    PLAYBACK = 0
+    LOOKUP = 1
+    PREFETCH = 2
+    SEARCH = 3
+
+
+@dataclass(slots=True, eq=False)
+class Job:
+    guild_id: int
+    priority: Priority
+    func: Callable[..., Any]
+    args: tuple
+    future: asyncio.Future
+    key: str | None = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started: bool = False
+    waiters: int = 0
+
+
+class ExtractionScheduler:
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Extraction")
+        self.queues: list[OrderedDict[int, deque[Job]]] = [OrderedDict() for _ in Priority]
+        self.keyed_jobs: dict[str, Job] = {}
+        self.active: int = 0
+        self.wait_times = Histogram(max_samples=1024)
+
+    # ================================================================ #
+    # Submission                                                       #
+    # ================================================================ #
+    async def submit(self, guild_id: int, priority: Priority, func: Callable[..., Any], *args: Any, key: str | None = None) -> Any:
+        job = self.keyed_jobs.get(key) if key else None
+        if job:
+            if not job.started and priority < job.priority:
+                self.remove_job(job)
+                job.priority = priority
+                self.add_job(job)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            job = Job(guild_id=guild_id, priority=priority, func=func, args=args, future=future, key=key)
+            if key:
+                self.keyed_jobs[key] = job
+            self.add_job(job)
+
+        self.dispatch()
+        job.waiters += 1
+        try:
+            return await asyncio.shield(job.future)
+        finally:
+            job.waiters -= 1
+            # A job nobody waits for any more, such as a cancelled prefetch, is dropped before it takes a worker.
+            if not job.waiters and not job.started and not job.future.done():
+                self.cancel_job(job)
+
+    def add_job(self, job: Job) -> None:
+        guild_queues = self.queues[job.priority]
+        guild_queues.setdefault(job.guild_id, deque()).append(job)
+
+    def cancel_job(self, job: Job) -> None:
+        self.remove_job(job)
+        if job.key and self.keyed_jobs.get(job.key) is job:
+            del self.keyed_jobs[job.key]
+        job.future.cancel()
+
+    def remove_job(self, job: Job) -> None:
+        guild_queues = self.queues[job.priority]
+        guild_queue = guild_queues.get(job.guild_id)
+        if not guild_queue:
+            return
+
+        guild_queue.remove(job)
+        if not guild_queue:
+            del guild_queues[job.guild_id]
+
+    # ================================================================ #
+    # Dispatching                                                      #
+    # ================================================================ #
+    def next_job(self) -> Job | None:
+        for guild_queues in self.queues:
+            if not guild_queues:
+                continue
+
+            # Round-robin across guilds: take one job, then rotate the guild to the back.
+            guild_id, guild_queue = next(iter(guild_queues.items()))
+            job = guild_queue.popleft()
+            if guild_queue:
+                guild_queues.move_to_end(guild_id)
+            else:
+                del guild_queues[guild_id]
+            return job
+
+        return None
+
+    def dispatch(self) -> None:
+        while self.active < self.workers:
+            job = self.next_job()
+            if not job:
+                return
+
+            job.started = True
+            self.active += 1
+            self.wait_times.observe(time.monotonic() - job.enqueued_at)
+
+            loop = asyncio.get_running_loop()
+            executor_future = loop.run_in_executor(self.executor, job.func, *job.args)
+            executor_future.add_done_callback(lambda f, job=job: self.on_job_done(job, f))
+
+    def on_job_done(self, job: Job, executor_future: asyncio.Future) -> None:
+        self.active -= 1
+        if job.key:
+            self.keyed_jobs.pop(job.key, None)
+
+        if not job.future.done():
+            if executor_future.cancelled():
+                job.future.cancel()
+            elif executor_future.exception():
+                job.future.set_exception(executor_future.exception())
+            else:
+                job.future.set_result(executor_future.result())
+
+        self.dispatch()
+
+    # ================================================================ #
+    # State Inspectors                                                 #
+    # ================================================================ #
+    def get_queue_depth(self) -> int:
+        return sum(len(guild_queue) for guild_queues in self.queues for guild_queue in guild_queues.values())
+
+    # ================================================================ #
+    # Shutdown                                                         #
+    # ================================================================ #
+    def shutdown(self) -> None:
+        for guild_queues in self.queues:
+            for guild_queue in guild_queues.values():
+                for job in guild_queue:
+                    if not job.future.done():
+                        job.future.cancel()
+            guild_queues.clear()
+
+        self.keyed_jobs.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,76 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from config import get_config
+from logger import configure_logger
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def get_shard_groups(shard_count: int, processes: int) -> list[list[int]]:
+    processes = max(1, min(processes, shard_count))
+    group_size, remainder = divmod(shard_count, processes)
+    groups = []
+    start = 0
+    for index in range(processes):
+        end = start + group_size + (1 if index < remainder else 0)
+        groups.append(list(range(start, end)))
+        start = end
+    return groups
+
+
+def spawn(index: int, shard_ids: list[int], shard_count: int, process_count: int) -> subprocess.Popen:
+    main_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    env = os.environ.copy()
+    env["JMB_PROCESS_INDEX"] = str(index)
+    env["JMB_SHARD_IDS"] = ",".join(str(shard_id) for shard_id in shard_ids)
+    env["JMB_SHARD_COUNT"] = str(shard_count)
+    env["JMB_PROCESS_COUNT"] = str(process_count)
+    logger.info(f"Starting process {index} with shards {shard_ids}.")
+    return subprocess.Popen([sys.executable, main_file_path], env=env)
+
+
+def main() -> None:
+    configure_logger()
+
+    sharding_options = get_config().bot.sharding_options
+    shard_count = sharding_options.shard_count
+    restart_delay = sharding_options.restart_delay
+    groups = get_shard_groups(shard_count, sharding_options.processes)
+
+    processes = {index: spawn(index, shard_ids, shard_count, len(groups)) for index, shard_ids in enumerate(groups)}
+    is_stopping = False
+
+    def stop(signum: int, frame: object) -> None:
+        nonlocal is_stopping
+        is_stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while not is_stopping:
+        time.sleep(1)
+        for index, process in processes.items():
+            if process.poll() is None:
+                continue
+
+            logger.error(f"Process {index} exited with code {process.returncode}. Restarting...")
+            time.sleep(restart_delay)
+            processes[index] = spawn(index, groups[index], shard_count, len(groups))
+
+    for process in processes.values():
+        if process.poll() is None:
+            process.terminate()
+    for process in processes.values():
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,132 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
 import os
-import yaml
+import queue
+import threading
+import time
+
+from config import ROOT, get_config
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload)
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, interval: float, max_keys: int = 1024) -> None:
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self.last_seen: dict[tuple[int, str], tuple[float, int]] = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+
+        key = (record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self.lock:
+            last_seen, suppressed = self.last_seen.get(key, (0.0, 0))
+            if now - last_seen < self.interval:
+                self.last_seen[key] = (last_seen, suppressed + 1)
+                return False
+
+            if len(self.last_seen) >= self.max_keys:
+                self.last_seen.clear()
+            self.last_seen[key] = (now, 0)
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} [{suppressed} identical messages suppressed]"
+            record.args = ()
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped: int = 0
+        self.unreported: int = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener's handlers do the formatting, so exc_info is kept for JsonFormatter's exception field.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Handler.handle holds the handler lock around emit, so the counters need no lock of their own.
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self.unreported += 1
+            return
+
+        unreported, self.unreported = self.unreported, 0
+        if not unreported:
+            return
+
+        # Reported once the queue has room again, since a warning logged while it is full would be dropped too.
+        message = f"Dropped {unreported} log records because the log queue was full."
+        warning = logging.LogRecord(record.name, logging.WARNING, __file__, 0, message, None, None)
+        try:
+            self.queue.put_nowait(warning)
+        except queue.Full:
+            self.unreported += unreported
 
 
 def configure_logger() -> None:
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    config_file_path = f"{root}/config/logger_config.yaml"
-    with open(config_file_path, "r") as f:
-        config = yaml.safe_load(f)
+    config = get_config()
+    logger_config = config.logger
+    logs_file_name = logger_config.file_name
 
-    logs_directory_name = config.get("directory_name", "logs")
-    logs_file_name = config.get("file_name", "logs.txt")
+    # Sharded processes each rotate their own file.
+    process = config.process
+    if process.is_launched:
+        name, extension = os.path.splitext(logs_file_name)
+        logs_file_name = f"{name}.{process.index}{extension}"
 
-    logs_directory_path = f"{root}/{logs_directory_name}"
+    logs_directory_path = f"{ROOT}/{logger_config.directory_name}"
     logs_file_path = f"{logs_directory_path}/{logs_file_name}"
 
-    logs_format = config.get("format", "[%(asctime)s][%(levelname)s] %(message)s")
+    if logger_config.json:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(logger_config.format)
 
     os.makedirs(logs_directory_path, exist_ok=True)
-    logging.basicConfig(
-        level=logging.INFO,
-        format=logs_format,
-        handlers=[logging.StreamHandler(), logging.FileHandler(logs_file_path)]
+    file_handler = logging.handlers.RotatingFileHandler(
+        logs_file_path,
+        maxBytes=logger_config.max_bytes,
+        backupCount=logger_config.backup_count
     )
+    stream_handler = logging.StreamHandler()
+    for handler in (stream_handler, file_handler):
+        handler.setFormatter(formatter)
+
+    # Records are handed to a background thread so the event loop never blocks on disk or console writes.
+    log_queue: queue.Queue = queue.Queue(maxsize=logger_config.queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    rate_limit_interval = logger_config.rate_limit_interval
+    if rate_limit_interval:
+        queue_handler.addFilter(RateLimitFilter(rate_limit_interval))
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
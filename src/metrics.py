@@ -0,0 +1,216 @@
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+import os
+import threading
+import time
+from typing import Callable, Iterator
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    def __init__(self, max_samples: int) -> None:
+        self.samples: deque[float] = deque(maxlen=max_samples)
+        self.count: int = 0
+        self.total: float = 0.0
+
+    def observe(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def get_quantiles(self) -> dict[float, float]:
+        samples = sorted(self.samples)
+        if not samples:
+            return {quantile: 0.0 for quantile in QUANTILES}
+        return {quantile: samples[min(len(samples) - 1, int(quantile * len(samples)))] for quantile in QUANTILES}
+
+
+class StageTimings:
+    def __init__(self, max_samples: int = 1024) -> None:
+        self.max_samples = max_samples
+        self.histograms: dict[str, Histogram] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        histogram = self.histograms.get(stage)
+        if not histogram:
+            histogram = self.histograms.setdefault(stage, Histogram(self.max_samples))
+        histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def get_summary(self) -> dict[str, dict]:
+        summary = {}
+        for stage, histogram in sorted(self.histograms.items()):
+            quantiles = histogram.get_quantiles()
+            summary[stage] = {
+                "count": histogram.count,
+                "p50": quantiles[0.5],
+                "p95": quantiles[0.95],
+                "p99": quantiles[0.99]
+            }
+        return summary
+
+    async def log_summaries(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            for stage, summary in self.get_summary().items():
+                logger.info(
+                    f"Latency {stage}: count={summary['count']} "
+                    f"p50={summary['p50'] * 1000:.0f}ms p95={summary['p95'] * 1000:.0f}ms p99={summary['p99'] * 1000:.0f}ms"
+                )
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.values: dict[tuple[str, ...], float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            values = list(self.values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{format_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, collect: Callable[[], float]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge", f"{self.name} {self.collect()}"]
+
+
+class Summary:
+    def __init__(self, name: str, documentation: str, histogram: Histogram) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.histogram = histogram
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} summary"]
+        for quantile, value in self.histogram.get_quantiles().items():
+            lines.append(f'{self.name}{{quantile="{quantile}"}} {value}')
+        lines.append(f"{self.name}_count {self.histogram.count}")
+        lines.append(f"{self.name}_sum {self.histogram.total}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, stage_timings: StageTimings) -> None:
+        self.stage_timings = stage_timings
+        self.metrics: list[Counter | Gauge | Summary] = []
+        self.loop_lag: float = 0.0
+
+    def register(self, metric: Counter | Gauge | Summary) -> Counter | Gauge | Summary:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                logger.exception(e)
+
+        lines.append("# HELP jmb_stage_seconds Duration of each /play pipeline stage.")
+        lines.append("# TYPE jmb_stage_seconds summary")
+        for stage, histogram in sorted(self.stage_timings.histograms.items()):
+            for quantile, value in histogram.get_quantiles().items():
+                lines.append(f'jmb_stage_seconds{{stage="{stage}",quantile="{quantile}"}} {value}')
+            lines.append(f'jmb_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            lines.append(f'jmb_stage_seconds_sum{{stage="{stage}"}} {histogram.total}')
+
+        return "\n".join(lines) + "\n"
+
+    async def monitor_loop_lag(self, interval: float) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lag = max(0.0, time.perf_counter() - start - interval)
+
+
+class MetricsServer:
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.routes: dict[str, Callable[[], str]] = {}
+        self.server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        logger.info(f"Metrics server listening on {self.host}:{self.port}.")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?")[0] if len(parts) > 1 else ""
+            route = self.routes.get(path)
+            if route:
+                status, body = "200 OK", route()
+            else:
+                status, body = "404 Not Found", "Not Found\n"
+
+            payload = body.encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.exception(e)
+        finally:
+            writer.close()
+
+    async def close(self) -> None:
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+
+def get_process_cpu_seconds(pid: int) -> float | None:
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+    except OSError:
+        return None
+
+    # Fields after the parenthesised command name; utime and stime are the 12th and 13th of them.
+    fields = stat.rsplit(")", 1)[-1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def format_labels(label_names: tuple[str, ...], label_values: tuple[str, ...]) -> str:
+    if not label_names:
+        return ""
+    labels = ",".join(f'{name}="{value}"' for name, value in zip(label_names, label_values))
+    return f"{{{labels}}}"
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import discord
 
 
 @dataclass(slots=True)
@@ -6,3 +7,9 @@ class Track:
     url: str
     title: str
     text_channel_id: int
+    duration: float | None = None
+    info: dict | None = field(default=None, repr=False)
+    source: discord.AudioSource | None = field(default=None, repr=False)
+    frames: list[bytes] | None = field(default=None, repr=False)
+    requested_at: float = 0.0
+    enqueued_at: float = 0.0
@@ -2,28 +2,63 @@ import asyncio
 import discord
 from discord import app_commands
 from discord.ext import commands
+import hashlib
+import json
 import os
+import time
 import traceback
-import yaml
 
+from audio_sources import unwrap_source
+from config import ROOT, CommandSyncOptions, Config, Messages, MetricsOptions, PlayerOptions, QueueStoreOptions, get_config, watch_config
+from metrics import Counter, Gauge, MetricsRegistry, MetricsServer, StageTimings, Summary
 from models import Track
 from music_fetcher import MusicFetcher
 from music_player import MusicPlayer
+from queue_store import QueueStore
+from queue_view import QueueView, StoredQueue
+from search_index import TitleIndex
+from url_utils import canonicalize_url, is_playlist_url, is_url
 
 import logging
 logger = logging.getLogger(__name__)
 
 
-class MusicBot(commands.Bot):
+class MusicBot(commands.AutoShardedBot):
     # ================================================================ #
     # Configuration                                                    #
     # ================================================================ #
     def __init__(self) -> None:
-        super().__init__(command_prefix="", intents=discord.Intents.default())
-        self.messages: dict[str, str] = {}
+        # The launcher assigns each process a disjoint shard group; without it, one process runs every shard.
+        process = get_config().process
+        super().__init__(
+            command_prefix="",
+            intents=discord.Intents.default(),
+            shard_ids=list(process.shard_ids) if process.shard_ids else None,
+            shard_count=process.shard_count
+        )
+        self.process = process
+        self.messages = Messages()
+        self.player_options = PlayerOptions()
+        self.title_index = TitleIndex(max_size=self.player_options.title_index_size)
+        self.queue_store_options = QueueStoreOptions()
+        self.command_sync_options = CommandSyncOptions()
+        self.queue_store: QueueStore | None = None
         self.music_fetcher = MusicFetcher()
         self.music_players: dict[int, MusicPlayer] = {}
         self.music_player_locks: dict[int, asyncio.Lock] = {}
+        self.listener_counts: dict[int, tuple[int, int]] = {}
+        self.idle_disconnect_tasks: dict[int, asyncio.Task] = {}
+        self.reap_task: asyncio.Task | None = None
+        self.config_task: asyncio.Task | None = None
+        self.search_tasks: set[asyncio.Task] = set()
+        self.stage_timings = StageTimings()
+        self.metrics_options = MetricsOptions()
+        self.metrics_tasks: set[asyncio.Task] = set()
+        self.metrics_server: MetricsServer | None = None
+        self.metrics = MetricsRegistry(self.stage_timings)
+        self.playback_errors = Counter("jmb_playback_errors_total", "Errors reported to after_callback by error type.", ("error_type",))
+        self.ffmpeg_cpu_seconds = Counter("jmb_ffmpeg_cpu_seconds_total", "CPU time used by playback FFmpeg processes.")
+        self.register_metrics()
 
     def run(self) -> None:
         token = os.getenv("JMB_TOKEN")
@@ -33,26 +68,143 @@ class MusicBot(commands.Bot):
 
         super().run(token, log_handler=None)
 
+    async def close(self) -> None:
+        for task in self.metrics_tasks:
+            task.cancel()
+        for task in self.idle_disconnect_tasks.values():
+            task.cancel()
+        if self.reap_task:
+            self.reap_task.cancel()
+        if self.config_task:
+            self.config_task.cancel()
+        if self.metrics_server:
+            await self.metrics_server.close()
+        if self.queue_store:
+            await self.queue_store.close()
+        await super().close()
+        self.music_fetcher.close()
+
     async def setup_hook(self) -> None:
         self.configure()
         self.add_commands()
         self.tree.on_error = self.on_app_command_error
-        await self.tree.sync()
+        self.start_queue_store()
+        self.start_reaping()
+        self.start_config_watch()
+        await self.start_metrics()
+        if self.process.index == 0:
+            await self.sync_commands()
 
     def configure(self) -> None:
-        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        config_file_path = f"{root}/config/bot_config.yaml"
-        with open(config_file_path, "r") as f:
-            config = yaml.safe_load(f)
+        config = get_config()
+        self.apply_config(config)
+        self.title_index = TitleIndex(max_size=self.player_options.title_index_size)
+        self.metrics_options = config.bot.metrics_options
+        self.queue_store_options = config.bot.queue_store_options
+        self.command_sync_options = config.bot.command_sync_options
+
+    def apply_config(self, config: Config) -> None:
+        # Only settings read per use are reloadable; players created after a reload pick up new player options.
+        self.messages = config.bot.messages
+        self.player_options = config.bot.player_options
+
+    def start_config_watch(self) -> None:
+        config_options = get_config().bot.config_options
+        if not config_options.hot_reload:
+            return
+
+        self.config_task = asyncio.create_task(watch_config(config_options.reload_interval, self.apply_config), name="ConfigWatch")
+
+    def start_queue_store(self) -> None:
+        queue_store_options = self.queue_store_options
+        if not queue_store_options.enabled:
+            return
 
-        self.messages = config.get("messages", {})
+        file_path = f"{ROOT}/{queue_store_options.directory_name}/{queue_store_options.file_name}"
+        self.queue_store = QueueStore(file_path, queue_store_options.flush_interval)
+        self.queue_store.start()
+
+    def start_reaping(self) -> None:
+        timeout = self.player_options.idle_player_timeout
+        if not timeout:
+            return
+
+        interval = self.player_options.idle_player_check_interval
+        self.reap_task = asyncio.create_task(self.reap_idle_music_players(interval, timeout), name="IdlePlayerReaper")
+
+    def register_metrics(self) -> None:
+        self.metrics.register(self.playback_errors)
+        self.metrics.register(self.ffmpeg_cpu_seconds)
+        self.metrics.register(self.music_fetcher.extraction_failures)
+        self.metrics.register(Gauge("jmb_music_players", "Active music players.", lambda: len(self.music_players)))
+        self.metrics.register(Gauge("jmb_voice_clients", "Connected voice clients.", lambda: len(self.voice_clients)))
+        self.metrics.register(Gauge("jmb_queued_tracks", "Tracks queued across all players.", lambda: sum(len(music_player.queue) for music_player in self.music_players.values())))
+        self.metrics.register(Gauge("jmb_ffmpeg_processes", "Live FFmpeg subprocesses.", self.count_ffmpeg_processes))
+        self.metrics.register(Gauge("jmb_event_loop_lag_seconds", "Most recent event loop lag.", lambda: self.metrics.loop_lag))
+        self.metrics.register(Gauge("jmb_extraction_queue_depth", "Extractions waiting for a worker.", self.music_fetcher.scheduler.get_queue_depth))
+        self.metrics.register(Gauge("jmb_extraction_active", "Extractions running on a worker.", lambda: self.music_fetcher.scheduler.active))
+        self.metrics.register(Summary("jmb_extraction_wait_seconds", "Time extractions waited for a worker.", self.music_fetcher.scheduler.wait_times))
+
+    async def start_metrics(self) -> None:
+        summary_interval = self.metrics_options.summary_interval
+        if summary_interval:
+            task = asyncio.create_task(self.stage_timings.log_summaries(summary_interval), name="LatencySummaries")
+            self.metrics_tasks.add(task)
+
+        if not self.metrics_options.enabled:
+            return
+
+        task = asyncio.create_task(self.metrics.monitor_loop_lag(self.metrics_options.loop_lag_interval), name="LoopLagMonitor")
+        self.metrics_tasks.add(task)
+
+        port = self.metrics_options.port + self.process.index
+        self.metrics_server = MetricsServer(self.metrics_options.host, port)
+        self.metrics_server.routes["/metrics"] = self.metrics.render
+        self.metrics_server.routes["/health"] = self.render_health
+        try:
+            await self.metrics_server.start()
+        except OSError as e:
+            logger.error(f"Metrics server failed to start: {e}")
+            self.metrics_server = None
+
+    def get_command_tree_hash(self) -> str:
+        commands = sorted((command.to_dict(self.tree) for command in self.tree.get_commands()), key=lambda command: command["name"])
+        payload = json.dumps({"application_id": self.application_id, "commands": commands}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def sync_commands(self) -> None:
+        # A global sync is slow and rate limited, so it only runs when the command definitions have changed.
+        command_sync_options = self.command_sync_options
+        hash_file_path = f"{ROOT}/{command_sync_options.directory_name}/{command_sync_options.file_name}"
+        tree_hash = self.get_command_tree_hash()
+        try:
+            with open(hash_file_path, "r") as f:
+                synced_hash = f.read().strip()
+        except OSError:
+            synced_hash = None
+
+        if synced_hash == tree_hash and not command_sync_options.force:
+            logger.info("Command tree unchanged. Skipping sync.")
+            return
+
+        await self.tree.sync()
+        os.makedirs(os.path.dirname(hash_file_path), exist_ok=True)
+        with open(hash_file_path, "w") as f:
+            f.write(tree_hash)
+        logger.info("Command tree synced.")
 
     def add_commands(self) -> None:
-        self.tree.add_command(app_commands.Command(
+        # Autocomplete callbacks must be plain functions; discord.py would try to rebind a bound method.
+        async def play_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+            return await self.play_autocomplete(interaction, current)
+
+        play_command = app_commands.Command(
             name="play",
-            description="Play track given a YouTube URL.",
+            description="Play tracks given a search or YouTube video or playlist URLs.",
             callback=self.play_command
-        ))
+        )
+        play_command.autocomplete("url")(play_autocomplete)
+        self.tree.add_command(play_command)
         self.tree.add_command(app_commands.Command(
             name="pause",
             description="Pause the current track.",
@@ -100,6 +252,9 @@ class MusicBot(commands.Bot):
     async def on_ready(self) -> None:
         logger.info(f"{self.user} successfully started.")
 
+    async def on_shard_ready(self, shard_id: int) -> None:
+        logger.info(f"Shard {shard_id} ready.")
+
     async def on_guild_join(self, guild: discord.Guild) -> None:
         logger.info(f"{guild.name} invited bot.")
 
@@ -108,10 +263,20 @@ class MusicBot(commands.Bot):
         await self.delete_music_player(guild.id)
 
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState) -> None:
-        if member.bot:
+        # Mute, deafen and stream toggles don't change who is listening.
+        if before.channel == after.channel:
             return
 
-        voice_client = self.get_voice_client(member.guild)
+        guild = member.guild
+        if member.id == self.user.id:
+            self.listener_counts.pop(guild.id, None)
+            if not after.channel:
+                self.cancel_idle_disconnect(guild.id)
+                return
+        elif member.bot:
+            return
+
+        voice_client = self.get_voice_client(guild)
         if not voice_client:
             return
 
@@ -119,9 +284,17 @@ class MusicBot(commands.Bot):
         if not voice_channel:
             return
 
-        if len(voice_channel.members) == 1:
-            await self.delete_music_player(member.guild.id)
-            await voice_client.disconnect()
+        is_leaving = before.channel is not None and before.channel.id == voice_channel.id
+        is_joining = after.channel is not None and after.channel.id == voice_channel.id
+        if member.id != self.user.id and not is_leaving and not is_joining:
+            return
+
+        listener_count = self.update_listener_count(voice_channel, is_joining, is_leaving)
+        if listener_count:
+            self.cancel_idle_disconnect(guild.id)
+        elif guild.id not in self.idle_disconnect_tasks:
+            task = asyncio.create_task(self.disconnect_when_idle(guild), name=f"IdleDisconnect_{guild.id}")
+            self.idle_disconnect_tasks[guild.id] = task
 
     async def on_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError) -> None:
         logger.exception(error)
@@ -132,11 +305,11 @@ class MusicBot(commands.Bot):
             return
 
         if isinstance(error, app_commands.MissingPermissions):
-            message = self.messages.get("error_permissions", "Missing permissions.")
+            message = self.messages.error_permissions
         elif isinstance(error, app_commands.CommandInvokeError):
-            message = self.messages.get("error_command", "Something went wrong while running your command.")
+            message = self.messages.error_command
         else:
-            message = self.messages.get("error_unknown", "An unknown error occurred.")
+            message = self.messages.error_unknown
 
         await self.safe_followup(interaction, message)
 
@@ -145,7 +318,7 @@ class MusicBot(commands.Bot):
     # ================================================================ #
     async def safe_followup(self, interaction: discord.Interaction, message: str) -> None:
         if not interaction or interaction.is_expired() or not isinstance(message, str):
-            logger.warning(self.messages.get("error_interaction", "Invalid interaction."))
+            logger.warning(self.messages.error_interaction)
             return
 
         if not interaction.response.is_done():
@@ -153,8 +326,93 @@ class MusicBot(commands.Bot):
         else:
             await interaction.followup.send(message)
 
+    def render_health(self) -> str:
+        guild_counts: dict[int, int] = {}
+        for guild in self.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+
+        shards = {}
+        for shard_id, shard in self.shards.items():
+            shards[shard_id] = {
+                "is_closed": shard.is_closed(),
+                "is_ws_ratelimited": shard.is_ws_ratelimited(),
+                "latency": shard.latency,
+                "guilds": guild_counts.get(shard_id, 0)
+            }
+
+        health = {
+            "process_index": self.process.index,
+            "shard_count": self.shard_count,
+            "is_ready": self.is_ready(),
+            "shards": shards
+        }
+        return json.dumps(health) + "\n"
+
+    def count_ffmpeg_processes(self) -> int:
+        count = 0
+        for voice_client in self.voice_clients:
+            source = getattr(voice_client, "source", None)
+            if source is not None and isinstance(unwrap_source(source), discord.FFmpegAudio):
+                count += 1
+
+        # Only the track at the front of each queue can hold a warmed FFmpeg source.
+        for music_player in self.music_players.values():
+            if music_player.queue and music_player.queue[0].source:
+                count += 1
+
+        # Cache writes waiting on the write semaphore have not started FFmpeg yet.
+        if self.music_fetcher.audio_cache:
+            count += self.music_fetcher.audio_cache.active_writes
+        return count
+
+    def update_listener_count(self, voice_channel: discord.VoiceChannel, is_joining: bool, is_leaving: bool) -> int:
+        guild_id = voice_channel.guild.id
+        entry = self.listener_counts.get(guild_id)
+        if entry and entry[0] == voice_channel.id:
+            listener_count = entry[1] + is_joining - is_leaving
+        else:
+            # Seeded after discord.py has applied the update, so the event itself is already counted.
+            listener_count = sum(1 for member in voice_channel.members if not member.bot)
+
+        self.listener_counts[guild_id] = (voice_channel.id, listener_count)
+        return listener_count
+
+    async def disconnect_when_idle(self, guild: discord.Guild) -> None:
+        try:
+            await asyncio.sleep(self.player_options.idle_disconnect_delay)
+        except asyncio.CancelledError:
+            return
+
+        if self.idle_disconnect_tasks.get(guild.id) is asyncio.current_task():
+            self.idle_disconnect_tasks.pop(guild.id)
+
+        entry = self.listener_counts.get(guild.id)
+        if entry and entry[1]:
+            return
+
+        # The incremental count drifts if a gateway event is missed, so it is checked against the members once here.
+        voice_client = self.get_voice_client(guild)
+        voice_channel = voice_client.channel if voice_client else None
+        if voice_channel:
+            listener_count = sum(1 for member in voice_channel.members if not member.bot)
+            self.listener_counts[guild.id] = (voice_channel.id, listener_count)
+            if listener_count:
+                return
+
+        await self.delete_music_player(guild.id)
+        voice_client = self.get_voice_client(guild)
+        if voice_client:
+            await voice_client.disconnect()
+
+    def cancel_idle_disconnect(self, guild_id: int) -> None:
+        task = self.idle_disconnect_tasks.pop(guild_id, None)
+        if task:
+            task.cancel()
+
     def get_voice_client(self, guild: discord.Guild) -> discord.VoiceClient | None:
-        voice_client = discord.utils.get(self.voice_clients, guild=guild)
+        # Guild.voice_client reads the connection state's guild ID index, which discord.py
+        # updates on connect, move and disconnect.
+        voice_client = guild.voice_client
         return voice_client
 
     async def get_music_player(self, guild_id: int) -> MusicPlayer:
@@ -171,6 +429,126 @@ class MusicBot(commands.Bot):
             self.music_players[guild_id] = music_player
             return music_player
 
+    async def reap_idle_music_players(self, interval: float, timeout: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            for guild_id, music_player in list(self.music_players.items()):
+                # Without a queue store, a looping player's only state would be lost, so it is kept.
+                if music_player.is_idle(timeout) and (self.queue_store or not music_player.is_looping):
+                    try:
+                        await self.reap_music_player(guild_id, timeout)
+                    except Exception as e:
+                        logger.exception(e)
+
+    async def reap_music_player(self, guild_id: int, timeout: float) -> None:
+        lock = self.music_player_locks.get(guild_id)
+        if not lock:
+            return
+
+        async with lock:
+            music_player = self.music_players.get(guild_id)
+            if not music_player or not music_player.is_idle(timeout):
+                return
+
+            # The snapshot is restored by the next /play, like a queue left over from a restart.
+            self.music_players.pop(guild_id)
+            await music_player.suspend()
+            self.music_player_locks.pop(guild_id, None)
+
+    async def get_restored_music_player(self, guild_id: int) -> MusicPlayer:
+        music_player = await self.get_music_player(guild_id)
+        # Marked active before any extraction, so the reaper leaves it alone while /play is still working.
+        music_player.last_active_at = time.monotonic()
+        await music_player.restore()
+        return music_player
+
+    async def get_live_music_player(self, music_player: MusicPlayer) -> MusicPlayer | None:
+        # A player the reaper suspended mid-command is replaced; one shut down by /leave ends the command.
+        if not music_player.shutdown_event.is_set():
+            return music_player
+        if not music_player.is_suspended:
+            return None
+        return await self.get_restored_music_player(music_player.guild_id)
+
+    async def get_queue(self, guild_id: int) -> MusicPlayer | StoredQueue | None:
+        # An existing player is restored in place; otherwise a stored queue is read without creating one.
+        music_player = self.music_players.get(guild_id)
+        if music_player:
+            await music_player.restore()
+            return music_player
+
+        if not self.queue_store:
+            return None
+
+        snapshot = await self.queue_store.load(guild_id)
+        if not snapshot or not snapshot[1]:
+            return None
+        return StoredQueue(self, snapshot[1])
+
+    async def clear_stored_queue(self, guild_id: int) -> bool:
+        music_player = self.music_players.get(guild_id)
+        if not self.queue_store or (music_player and not music_player.needs_restore):
+            return False
+
+        snapshot = await self.queue_store.load(guild_id)
+        if music_player:
+            # Nothing is left to restore, so the player's own state is persisted from here on.
+            music_player.needs_restore = False
+        if not snapshot or not snapshot[1]:
+            return False
+
+        await self.queue_store.delete(guild_id)
+        return True
+
+    async def enqueue_track(self, interaction: discord.Interaction, music_player: MusicPlayer, url: str, requested_at: float) -> int:
+        text_channel = interaction.channel
+        with self.stage_timings.span("fetch_title"):
+            info = await self.music_fetcher.fetch_info(url, interaction.guild.id)
+        if not info:
+            message = self.messages.error_download
+            await text_channel.send(message)
+            return 0
+
+        music_player = await self.get_live_music_player(music_player)
+        if not music_player:
+            return 0
+
+        title = info.get("title", "Unknown Title")
+        track = Track(url=url, title=title, text_channel_id=text_channel.id, duration=info.get("duration"), info=info, requested_at=requested_at)
+        await music_player.enqueue(track)
+
+        message = f"Queued: `{title}`"
+        await text_channel.send(message)
+        return 1
+
+    async def enqueue_playlist(self, interaction: discord.Interaction, music_player: MusicPlayer, url: str, requested_at: float) -> int:
+        text_channel = interaction.channel
+        count = 0
+        # Tracks are queued as flat entries arrive; full resolution is left to the player's prefetch.
+        async for entry in self.music_fetcher.stream_playlist(url):
+            music_player = await self.get_live_music_player(music_player)
+            if not music_player:
+                break
+
+            track_url = self.music_fetcher.get_entry_url(entry)
+            if not track_url:
+                continue
+
+            title = entry.get("title") or "Unknown Title"
+            track = Track(url=track_url, title=title, text_channel_id=text_channel.id, duration=entry.get("duration"), requested_at=requested_at)
+            await music_player.enqueue(track)
+            requested_at = 0.0
+            count += 1
+
+        if not count:
+            message = self.messages.error_playlist
+            await text_channel.send(message)
+            return 0
+
+        message = f"Queued `{count}` tracks."
+        await text_channel.send(message)
+        return count
+
     async def delete_music_player(self, guild_id: int) -> None:
         music_player = self.music_players.pop(guild_id, None)
         if music_player:
@@ -182,61 +560,110 @@ class MusicBot(commands.Bot):
     # Commands                                                         #
     # ================================================================ #
     async def play_command(self, interaction: discord.Interaction, url: str) -> None:
-        await interaction.response.defer(thinking=True)
+        requested_at = time.perf_counter()
+        with self.stage_timings.span("defer"):
+            await interaction.response.defer(thinking=True)
 
         if not interaction.user.voice or not interaction.user.voice.channel:
-            message = self.messages.get("event_user_voiceless", "You're not in a voice channel.")
+            message = self.messages.event_user_voiceless
             await interaction.followup.send(message)
             return
 
         permissions = interaction.user.voice.channel.permissions_for(interaction.guild.me)
         if not permissions.connect or not permissions.speak:
-            message = self.messages.get("error_permissions", "I don't have permission to do that.")
+            message = self.messages.error_permissions
             await interaction.followup.send(message)
             return
 
+        # URLs are validated and canonicalized before any voice connection or extraction work.
+        track_urls = url.split()
+        is_search = not track_urls or not all(is_url(track_url) for track_url in track_urls)
+        has_invalid_urls = False
+        if not is_search:
+            canonical_urls = [canonicalize_url(track_url) for track_url in track_urls]
+            track_urls = [canonical_url for canonical_url in canonical_urls if canonical_url]
+            has_invalid_urls = len(track_urls) < len(canonical_urls)
+            if not track_urls:
+                message = self.messages.error_invalid_url
+                await interaction.followup.send(message)
+                return
+
         voice_client = self.get_voice_client(interaction.guild)
-        if not voice_client:
-            voice_client = await interaction.user.voice.channel.connect()
-        elif voice_client.channel != interaction.user.voice.channel:
-            await voice_client.move_to(interaction.user.voice.channel)
+        with self.stage_timings.span("connect"):
+            if not voice_client:
+                voice_client = await interaction.user.voice.channel.connect()
+            elif voice_client.channel != interaction.user.voice.channel:
+                await voice_client.move_to(interaction.user.voice.channel)
 
-        message = self.messages.get("event_play", "Working...")
+        message = self.messages.event_play
         await interaction.followup.send(message)
 
-        title = await self.music_fetcher.fetch_title(url)
-        if title == "Unknown Title":
-            text_channel = interaction.channel
-            message = self.messages.get("error_download", "I couldn't find that video.")
-            await text_channel.send(message)
-            return
-
-        music_player = await self.get_music_player(interaction.guild.id)
-        track = Track(url=url, title=title, text_channel_id=interaction.channel.id)
-        await music_player.enqueue(track)
-
-        text_channel = interaction.channel
-        message = f"Queued: `{title}`"
-        await text_channel.send(message)
+        if has_invalid_urls:
+            message = self.messages.error_invalid_url
+            await interaction.channel.send(message)
+
+        if is_search:
+            results = await self.music_fetcher.search(url, interaction.guild.id, is_rate_limited=False)
+            if not results:
+                message = self.messages.error_search
+                await interaction.channel.send(message)
+                return
+            track_urls = [results[0][1]]
+
+        music_player = await self.get_restored_music_player(interaction.guild.id)
+        for track_url in track_urls:
+            music_player = await self.get_live_music_player(music_player)
+            if not music_player:
+                break
+
+            # Only the first queued track is timed end to end; later ones also wait behind it.
+            if is_playlist_url(track_url):
+                count = await self.enqueue_playlist(interaction, music_player, track_url, requested_at)
+            else:
+                count = await self.enqueue_track(interaction, music_player, track_url, requested_at)
+            if count:
+                requested_at = 0.0
+
+    async def play_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        current = current.strip()
+        if len(current) < 2 or is_url(current):
+            return []
+
+        limit = 25
+        results = self.title_index.search(current, limit)
+        if len(results) < self.music_fetcher.search_limit:
+            # Discord drops autocomplete responses after 3 seconds; a slow search is left to finish into the cache.
+            task = asyncio.create_task(self.music_fetcher.search(current, interaction.guild_id))
+            self.search_tasks.add(task)
+            task.add_done_callback(self.search_tasks.discard)
+            try:
+                search_results = await asyncio.wait_for(asyncio.shield(task), timeout=2)
+            except asyncio.TimeoutError:
+                search_results = []
+
+            urls = {url for _, url in results}
+            results.extend(result for result in search_results if result[1] not in urls)
+
+        return [app_commands.Choice(name=title[:100], value=url) for title, url in results[:limit]]
 
     async def pause_command(self, interaction: discord.Interaction) -> None:
         await interaction.response.defer(thinking=True)
 
         voice_client = self.get_voice_client(interaction.guild)
         if not voice_client or not voice_client.is_connected():
-            message = self.messages.get("event_bot_voiceless", "I'm not in a voice channel.")
+            message = self.messages.event_bot_voiceless
             await interaction.followup.send(message)
             return
 
         if not voice_client.is_playing():
-            message = self.messages.get("event_not_playing", "I'm not playing anything.")
+            message = self.messages.event_not_playing
             await interaction.followup.send(message)
             return
 
         music_player = await self.get_music_player(interaction.guild.id)
         await music_player.pause()
 
-        message = self.messages.get("event_track_paused", "Paused.")
+        message = self.messages.event_track_paused
         await interaction.followup.send(message)
 
     async def resume_command(self, interaction: discord.Interaction) -> None:
@@ -244,19 +671,19 @@ class MusicBot(commands.Bot):
 
         voice_client = self.get_voice_client(interaction.guild)
         if not voice_client or not voice_client.is_connected():
-            message = self.messages.get("event_bot_voiceless", "I'm not in a voice channel.")
+            message = self.messages.event_bot_voiceless
             await interaction.followup.send(message)
             return
 
         if not voice_client.is_paused():
-            message = self.messages.get("event_not_paused", "I'm not paused.")
+            message = self.messages.event_not_paused
             await interaction.followup.send(message)
             return
 
         music_player = await self.get_music_player(interaction.guild.id)
         await music_player.resume()
 
-        message = self.messages.get("event_track_resumed", "Resumed.")
+        message = self.messages.event_track_resumed
         await interaction.followup.send(message)
 
     async def loop_command(self, interaction: discord.Interaction) -> None:
@@ -264,7 +691,7 @@ class MusicBot(commands.Bot):
 
         voice_client = self.get_voice_client(interaction.guild)
         if not voice_client or not voice_client.is_connected():
-            message = self.messages.get("event_bot_voiceless", "I'm not in a voice channel.")
+            message = self.messages.event_bot_voiceless
             await interaction.followup.send(message)
             return
 
@@ -272,55 +699,59 @@ class MusicBot(commands.Bot):
         music_player.toggle_looping()
 
         if music_player.is_looping:
-            message = self.messages.get("event_looping_enabled", "Looping enabled.")
+            message = self.messages.event_looping_enabled
         else:
-            message = self.messages.get("event_looping_disabled", "Looping disabled.")
+            message = self.messages.event_looping_disabled
         await interaction.followup.send(message)
 
     async def queue_command(self, interaction: discord.Interaction) -> None:
         await interaction.response.defer(thinking=True)
 
-        music_player = await self.get_music_player(interaction.guild.id)
-        if music_player.is_queue_empty():
-            message = self.messages.get("event_queue_empty", "The queue is empty.")
+        # Read-only, so a guild without a player is answered without creating one.
+        queue = await self.get_queue(interaction.guild.id)
+        if not queue or queue.is_queue_empty():
+            message = self.messages.event_queue_empty
             await interaction.followup.send(message)
             return
 
-        message = f"__Queue__\n" + "\n".join([f"`{track.title}`" for track in music_player.get_queue()])
-        await interaction.followup.send(message)
+        view = QueueView(queue, self.player_options.queue_page_size)
+        await interaction.followup.send(view.render_page(), view=view)
 
     async def skip_command(self, interaction: discord.Interaction) -> None:
         await interaction.response.defer(thinking=True)
 
         voice_client = self.get_voice_client(interaction.guild)
         if not voice_client or not voice_client.is_connected():
-            message = self.messages.get("event_bot_voiceless", "I'm not in a voice channel.")
+            message = self.messages.event_bot_voiceless
             await interaction.followup.send(message)
             return
 
         if not voice_client.is_playing() and not voice_client.is_paused():
-            message = self.messages.get("event_not_playing", "I'm not playing anything.")
+            message = self.messages.event_not_playing
             await interaction.followup.send(message)
             return
 
         music_player = await self.get_music_player(interaction.guild.id)
         await music_player.skip()
 
-        message = self.messages.get("event_track_skipped", "Skipped.")
+        message = self.messages.event_track_skipped
         await interaction.followup.send(message)
 
     async def clear_command(self, interaction: discord.Interaction) -> None:
         await interaction.response.defer(thinking=True)
 
-        music_player = await self.get_music_player(interaction.guild.id)
-        if music_player.is_queue_empty():
-            message = self.messages.get("event_queue_empty", "The queue is empty.")
+        # A stored queue is deleted rather than restored, so the next /play cannot bring it back.
+        music_player = self.music_players.get(interaction.guild.id)
+        has_stored_queue = await self.clear_stored_queue(interaction.guild.id)
+        if not has_stored_queue and (not music_player or music_player.is_queue_empty()):
+            message = self.messages.event_queue_empty
             await interaction.followup.send(message)
             return
 
-        await music_player.clear()
+        if music_player:
+            await music_player.clear()
 
-        message = self.messages.get("event_queue_cleared", "Queue cleared.")
+        message = self.messages.event_queue_cleared
         await interaction.followup.send(message)
 
     async def leave_command(self, interaction: discord.Interaction) -> None:
@@ -328,7 +759,7 @@ class MusicBot(commands.Bot):
 
         voice_client = self.get_voice_client(interaction.guild)
         if not voice_client or not voice_client.is_connected():
-            message = self.messages.get("event_bot_voiceless", "I'm not in a voice channel.")
+            message = self.messages.event_bot_voiceless
             await interaction.followup.send(message)
             return
 
@@ -338,9 +769,9 @@ class MusicBot(commands.Bot):
         if voice_client and voice_client.is_connected():
             await voice_client.disconnect()
 
-        message = self.messages.get("event_leave", "Bye.")
+        message = self.messages.event_leave
         await interaction.followup.send(message)
 
     async def help_commandj(self, interaction: discord.Interaction) -> None:
-        message = self.messages.get("help", "I can't help you.")
+        message = self.messages.help
         await interaction.response.send_message(message)
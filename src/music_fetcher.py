@@ -1,8 +1,20 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import discord
-import os
-import yaml
-import yt_dlp
+import threading
+import time
+from typing import AsyncIterator, Callable
+from urllib.parse import parse_qs, urlparse
+
+from audio_cache import AudioCache
+from audio_sources import CachedOpusAudio
+from config import ROOT, TranscodingProfile, get_config
+from extraction_scheduler import ExtractionScheduler, Priority
+from info_cache import InfoCache
+from metrics import Counter
+from search_index import normalize_words
+from url_utils import get_video_id
+from ydl_pool import YoutubeDLPool
 
 import logging
 logger = logging.getLogger(__name__)
@@ -10,40 +22,349 @@ logger = logging.getLogger(__name__)
 
 class MusicFetcher:
     def __init__(self) -> None:
-        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        config_file_path = f"{root}/config/music_config.yaml"
-        with open(config_file_path, "r") as f:
-            config = yaml.safe_load(f)
+        config = get_config()
+        music_config = config.music
+        self.ffmpeg_options = music_config.ffmpeg_options
+        self.ydl_options = music_config.ydl_options
+        transcoding_options = music_config.transcoding_options
+        self.passthrough: bool = transcoding_options.passthrough
+        self.passthrough_max_bitrate: float = transcoding_options.passthrough_max_bitrate
+        self.transcoding_profile = transcoding_options.profiles.get(transcoding_options.profile, TranscodingProfile())
+        self.extraction_failures = Counter("jmb_extraction_failures_total", "Failed yt-dlp extractions by error type.", ("error_type",))
+
+        info_cache_options = music_config.info_cache
+        self.expiry_margin: float = info_cache_options.expiry_margin
+        self.refresh_margin: float = info_cache_options.refresh_margin
+        self.info_cache = InfoCache(max_size=info_cache_options.max_size, ttl=info_cache_options.ttl)
+        self.failure_cache = InfoCache(max_size=info_cache_options.max_size, ttl=info_cache_options.failure_ttl)
+
+        workers = music_config.extraction.workers
+        self.scheduler = ExtractionScheduler(workers=workers)
+
+        # Pools used from scheduler jobs have an instance per worker, so a worker never blocks waiting for one.
+        ydl_pool_options = music_config.ydl_pool
+        self.ydl_pool = YoutubeDLPool(
+            options=self.ydl_options,
+            size=ydl_pool_options.size or workers,
+            max_uses=ydl_pool_options.max_uses
+        )
+
+        audio_cache_options = music_config.audio_cache
+        self.audio_cache: AudioCache | None = None
+        if audio_cache_options.enabled:
+            # Sharded processes each own a subdirectory and an equal share of the size cap, since startup
+            # cleanup and eviction assume a single writer.
+            process = config.process
+            directory_path = f"{ROOT}/{audio_cache_options.directory_name}"
+            if process.is_launched:
+                directory_path = f"{directory_path}/{process.index}"
+            self.audio_cache = AudioCache(
+                directory_path=directory_path,
+                max_bytes=int(audio_cache_options.max_size_mb * 1024 * 1024) // process.count,
+                max_duration=audio_cache_options.max_duration,
+                bitrate=audio_cache_options.bitrate,
+                max_concurrent_writes=audio_cache_options.max_concurrent_writes
+            )
+
+        search_options = music_config.search_options
+        self.search_limit: int = search_options.limit
+        self.search_interval: float = search_options.interval
+        self.search_cache = InfoCache(max_size=search_options.cache_size, ttl=search_options.cache_ttl)
+        self.last_search_times: dict[int, float] = {}
+        self.max_pending_searches: int = search_options.max_pending
+        self.pending_searches: int = 0
+
+        playlist_options = music_config.playlist_options
+        self.playlist_limit: int = playlist_options.limit
+        flat_ydl_options = {**self.ydl_options, **playlist_options.ydl_options}
+        # A playlist walk holds its instance for every page, so playlists run on their own threads, not the scheduler's.
+        self.playlist_executor = ThreadPoolExecutor(max_workers=playlist_options.pool_size, thread_name_prefix="Playlist")
+        self.playlist_ydl_pool = YoutubeDLPool(
+            options=flat_ydl_options,
+            size=playlist_options.pool_size,
+            max_uses=ydl_pool_options.max_uses
+        )
+        self.search_ydl_pool = YoutubeDLPool(
+            options=flat_ydl_options,
+            size=workers,
+            max_uses=ydl_pool_options.max_uses
+        )
+
+    # ================================================================ #
+    # Helpers                                                          #
+    # ================================================================ #
+    @staticmethod
+    def get_expiry(info: dict) -> float | None:
+        source_url = info.get("url")
+        if not source_url:
+            return None
 
-        self.ffmpeg_options: dict = config.get("ffmpeg_options", {})
-        self.ydl_options: dict = config.get("ydl_options", {})
+        expire = parse_qs(urlparse(source_url).query).get("expire")
+        if not expire:
+            return None
+
+        try:
+            return float(expire[0])
+        except ValueError:
+            return None
+
+    @staticmethod
+    def get_entry_url(entry: dict) -> str | None:
+        url = entry.get("url")
+        if url and url.startswith("http"):
+            return url
+
+        video_id = entry.get("id")
+        if video_id:
+            return f"https://www.youtube.com/watch?v={video_id}"
+        return None
 
+    @staticmethod
+    def get_error_type(error: Exception) -> str:
+        # DownloadError wraps the extractor's own exception, which is the more useful label.
+        exc_info = getattr(error, "exc_info", None)
+        if exc_info and exc_info[1]:
+            return type(exc_info[1]).__name__
+        return type(error).__name__
+
+    def record_failure(self, error: Exception) -> None:
+        # yt-dlp is only imported once extraction has started, so DownloadError is resolved here.
+        from yt_dlp.utils import DownloadError
+        if isinstance(error, DownloadError):
+            logger.error(error)
+        else:
+            logger.exception(error)
+        self.extraction_failures.inc(self.get_error_type(error))
+
+    def is_expired(self, info: dict) -> bool:
+        expiry = self.get_expiry(info)
+        return expiry is not None and expiry - self.expiry_margin <= time.time()
+
+    def needs_refresh(self, info: dict) -> bool:
+        # Refresh early enough that the URL outlives the whole track, not just its start.
+        expiry = self.get_expiry(info)
+        if expiry is None:
+            return False
+        now = time.time()
+        if expiry - self.refresh_margin - (info.get("duration") or 0) > now:
+            return False
+
+        # A fresh URL lasts no longer than one extracted moments ago, so a track longer than a URL's lifetime
+        # is refreshed at most once per refresh_margin instead of on every use.
+        extracted_at = info.get("epoch")
+        return extracted_at is None or now - extracted_at >= self.refresh_margin
+
+    # ================================================================ #
+    # Extraction                                                       #
+    # ================================================================ #
     def extract_info(self, url: str) -> dict | None:
         try:
-            with yt_dlp.YoutubeDL(self.ydl_options) as ydl:
+            with self.ydl_pool.lease() as ydl:
                 info = ydl.extract_info(url, download=False)
                 return info
-        except yt_dlp.utils.DownloadError as e:
-            logger.error(e)
         except Exception as e:
-            logger.exception(e)
+            self.record_failure(e)
 
         return None
 
-    async def fetch_title(self, url: str) -> str:
-        info = await asyncio.to_thread(self.extract_info, url)
+    async def fetch_info(self, url: str, guild_id: int, priority: Priority = Priority.LOOKUP) -> dict | None:
+        key = get_video_id(url)
+        info = self.info_cache.get(key)
+        if info:
+            return info
+
+        if self.failure_cache.get(key):
+            return None
+
+        info = await self.scheduler.submit(guild_id, priority, self.extract_info, url, key=key)
+        if not info:
+            self.failure_cache.put(key, {"failed": True})
+            return None
+
+        # yt-dlp records the extraction time as epoch; needs_refresh relies on it.
+        info.setdefault("epoch", int(time.time()))
+        self.cache_info(url, info)
+        return info
+
+    async def refresh_info(self, url: str, guild_id: int, priority: Priority = Priority.LOOKUP) -> dict | None:
+        self.info_cache.pop(get_video_id(url))
+        return await self.fetch_info(url, guild_id, priority)
+
+    def cache_info(self, url: str, info: dict) -> None:
+        expiry = self.get_expiry(info)
+        if expiry is not None:
+            expiry -= self.expiry_margin
+        self.info_cache.put(get_video_id(url), info, expiry)
+
+    def extract_playlist(self, url: str, on_entry: Callable[[dict], None], stop_event: threading.Event) -> None:
+        try:
+            with self.playlist_ydl_pool.lease() as ydl:
+                info = ydl.extract_info(url, download=False, process=False)
+                if not info:
+                    return
+
+                # Unprocessed playlist entries are a lazy generator, so pages are fetched as they are consumed.
+                entries = info.get("entries") or []
+                for count, entry in enumerate(entries):
+                    if stop_event.is_set() or count >= self.playlist_limit:
+                        break
+                    if entry:
+                        on_entry(entry)
+        except Exception as e:
+            self.record_failure(e)
+
+    async def stream_playlist(self, url: str) -> AsyncIterator[dict]:
+        loop = asyncio.get_running_loop()
+        entries: asyncio.Queue[dict | None] = asyncio.Queue()
+        stop_event = threading.Event()
+
+        def on_entry(entry: dict) -> None:
+            loop.call_soon_threadsafe(entries.put_nowait, entry)
+
+        # Entries are posted to the loop before the walk completes, so the sentinel always arrives last.
+        future = loop.run_in_executor(self.playlist_executor, self.extract_playlist, url, on_entry, stop_event)
+        future.add_done_callback(lambda _: entries.put_nowait(None))
+        try:
+            while True:
+                entry = await entries.get()
+                if entry is None:
+                    break
+                yield entry
+        finally:
+            stop_event.set()
+
+    def extract_search(self, query: str) -> list[dict] | None:
+        try:
+            with self.search_ydl_pool.lease() as ydl:
+                info = ydl.extract_info(f"ytsearch{self.search_limit}:{query}", download=False)
+                if not info:
+                    return []
+                return [entry for entry in info.get("entries") or [] if entry]
+        except Exception as e:
+            self.record_failure(e)
+
+        return None
+
+    async def search(self, query: str, guild_id: int, is_rate_limited: bool = True) -> list[tuple[str, str]]:
+        key = " ".join(normalize_words(query))
+        if not key:
+            return []
+
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            return cached["results"]
+
+        # Autocomplete fires on every keystroke, so each guild gets at most one search per interval,
+        # and the process as a whole at most max_pending_searches waiting or running at once.
+        now = time.monotonic()
+        if is_rate_limited:
+            if now - self.last_search_times.get(guild_id, 0.0) < self.search_interval or self.pending_searches >= self.max_pending_searches:
+                return []
+            self.last_search_times[guild_id] = now
+            if len(self.last_search_times) > 4096:
+                self.last_search_times = {key: value for key, value in self.last_search_times.items() if now - value < self.search_interval}
+
+        # Autocomplete is speculative, so it only runs when no playback, lookup or prefetch job is waiting.
+        priority = Priority.SEARCH if is_rate_limited else Priority.LOOKUP
+        self.pending_searches += is_rate_limited
+        try:
+            entries = await self.scheduler.submit(guild_id, priority, self.extract_search, query, key=f"search:{key}")
+        finally:
+            self.pending_searches -= is_rate_limited
+        if entries is None:
+            return []
+
+        results = []
+        for entry in entries:
+            url = self.get_entry_url(entry)
+            if url:
+                results.append((entry.get("title") or "Unknown Title", url))
+
+        # Failed searches are not cached and empty ones only briefly, so a network error cannot hide a query for long.
+        expires_at = None if results else time.time() + self.failure_cache.ttl
+        self.search_cache.put(key, {"results": results}, expires_at)
+        return results
+
+    async def fetch_title(self, url: str, guild_id: int) -> str:
+        info = await self.fetch_info(url, guild_id)
         if not info:
             return "Unknown Title"
         return info.get("title", "Unknown Title")
 
-    async def fetch_source(self, url: str) -> discord.AudioSource | None:
-        info = await asyncio.to_thread(self.extract_info, url)
+    async def fetch_source(self, url: str, guild_id: int, info: dict | None = None) -> discord.AudioSource | None:
+        video_id = info.get("id") if info else get_video_id(url)
+        cached_source = self.get_cached_source(video_id)
+        if cached_source:
+            return cached_source
+
+        if not info or self.is_expired(info):
+            info = await self.fetch_info(url, guild_id, Priority.PLAYBACK)
+        elif self.needs_refresh(info):
+            info = await self.refresh_info(url, guild_id, Priority.PLAYBACK)
         if not info:
             return None
 
+        return self.create_source(info)
+
+    def create_source(self, info: dict, start_position: float = 0.0) -> discord.AudioSource | None:
+        if not start_position:
+            cached_source = self.get_cached_source(info.get("id"))
+            if cached_source:
+                return cached_source
+
         source_url = info.get("url")
         if not source_url:
             return None
 
-        source = discord.FFmpegOpusAudio(source_url, **self.ffmpeg_options)
+        ffmpeg_options = self.get_ffmpeg_options(info)
+        if start_position:
+            ffmpeg_options["before_options"] = f"{ffmpeg_options['before_options']} -ss {start_position:.2f}".strip()
+
+        source = discord.FFmpegOpusAudio(source_url, **ffmpeg_options)
+        if self.audio_cache and not start_position:
+            self.audio_cache.store(info, self.ffmpeg_options.before_options)
         return source
+
+    def is_passthrough(self, info: dict) -> bool:
+        if not self.passthrough or info.get("acodec") != "opus":
+            return False
+        bitrate = info.get("abr") or info.get("tbr")
+        return bitrate is not None and bitrate <= self.passthrough_max_bitrate
+
+    def get_ffmpeg_options(self, info: dict) -> dict:
+        ffmpeg_options = {"before_options": self.ffmpeg_options.before_options, "options": self.ffmpeg_options.options}
+        # Opus input at a usable bitrate is copied into the Ogg stream without decoding or re-encoding.
+        if self.is_passthrough(info):
+            ffmpeg_options["codec"] = "opus"
+            return ffmpeg_options
+
+        profile = self.transcoding_profile
+        ffmpeg_options["bitrate"] = profile.bitrate
+        extra_options = [f"-threads {profile.threads}"]
+        if profile.low_cpu:
+            extra_options.append("-compression_level 0")
+        ffmpeg_options["options"] = " ".join([ffmpeg_options["options"], *extra_options]).strip()
+        return ffmpeg_options
+
+    def get_cached_source(self, video_id: str | None) -> discord.AudioSource | None:
+        if not self.audio_cache or not video_id:
+            return None
+
+        file_path = self.audio_cache.get(video_id)
+        if not file_path:
+            return None
+
+        try:
+            return CachedOpusAudio(file_path)
+        except (OSError, ValueError) as e:
+            logger.error(e)
+            return None
+
+    def close(self) -> None:
+        self.scheduler.shutdown()
+        self.playlist_executor.shutdown(wait=False, cancel_futures=True)
+        self.ydl_pool.close()
+        self.playlist_ydl_pool.close()
+        self.search_ydl_pool.close()
+        if self.audio_cache:
+            self.audio_cache.close()
@@ -1,8 +1,13 @@
 import asyncio
 from collections import deque
 import discord
+from itertools import islice
+import time
 from discord.ext import commands
 
+from audio_sources import BufferedOpusAudio, CachedOpusAudio, RecordingOpusAudio, TrackedAudio, unwrap_source
+from extraction_scheduler import Priority
+from metrics import get_process_cpu_seconds
 from models import Track
 
 import logging
@@ -18,13 +23,33 @@ class MusicPlayer:
         self.is_looping: bool = False
         self.queue: deque[Track] = deque()
         self.queue_condition = asyncio.Condition()
+        self.current_track: Track | None = None
+        self.needs_restore: bool = True
+        self.is_suspended: bool = False
+        self.queue_version: int = 0
+        self.queue_duration: float = 0.0
+        self.rendered_pages: dict[int, str] = {}
+        self.rendered_pages_version: int = 0
         self.shutdown_event = asyncio.Event()
         self.track_done_event = asyncio.Event()
+        player_options = bot.player_options
+        self.prefetch_depth: int = player_options.prefetch_depth
+        self.warm_ffmpeg: bool = player_options.warm_ffmpeg
+        self.prefetch_tasks: dict[int, asyncio.Task] = {}
+        self.loop_buffer_max_bytes: int = int(player_options.loop_buffer_max_mb * 1024 * 1024)
+        self.max_stream_retries: int = player_options.max_stream_retries
+        self.stream_end_tolerance: float = player_options.stream_end_tolerance
+        self.is_stopped: bool = False
+        self.ready_timeout: float = player_options.ready_timeout
+        self.last_active_at: float = time.monotonic()
         self.task = asyncio.create_task(self.run(), name=f"MusicPlayer_{guild_id}")
 
     @property
     def voice_client(self) -> discord.VoiceClient | None:
-        return discord.utils.get(self.bot.voice_clients, guild__id=self.guild_id)
+        guild = self.bot.get_guild(self.guild_id)
+        if not guild:
+            return None
+        return guild.voice_client
 
     # ================================================================ #
     # Main Loop                                                        #
@@ -40,11 +65,24 @@ class MusicPlayer:
                         break
 
                     track = self.queue.popleft()
+                    self.queue_version += 1
+                    self.queue_duration -= track.duration or 0
+                    self.current_track = track
+                    self.mark_dirty()
 
+                if track.enqueued_at:
+                    self.bot.stage_timings.observe("queue_wait", time.perf_counter() - track.enqueued_at)
+                self.schedule_prefetch()
+                is_repeat = False
                 while True:
-                    await self.play_track(track)
+                    await self.play_track(track, is_repeat)
                     if self.shutdown_event.is_set() or not self.is_looping:
                         break
+                    is_repeat = True
+                track.frames = None
+                self.current_track = None
+                self.last_active_at = time.monotonic()
+                self.mark_dirty()
 
         except asyncio.CancelledError:
             logger.info(f"{self.task.get_name()} cancelled.")
@@ -54,40 +92,202 @@ class MusicPlayer:
     # ================================================================ #
     # Main Loop Internals                                              #
     # ================================================================ #
-    async def play_track(self, track: Track) -> None:
+    async def play_track(self, track: Track, is_repeat: bool = False) -> None:
+        audio_source = track.source
+        track.source = None
+        if not audio_source and track.frames:
+            audio_source = BufferedOpusAudio(track.frames)
+        if not audio_source:
+            with self.bot.stage_timings.span("fetch_source"):
+                audio_source = await self.bot.music_fetcher.fetch_source(track.url, self.guild_id, track.info)
+        if not audio_source:
+            text_channel = self.bot.get_channel(track.text_channel_id)
+            if text_channel:
+                message = self.bot.messages.error_source
+                await text_channel.send(message)
+            return
+
+        is_streamed = not isinstance(audio_source, (BufferedOpusAudio, CachedOpusAudio))
+
+        # Keep the packets of looped tracks in memory so later repeats skip FFmpeg and the network.
+        recording_source = None
+        if self.is_looping and is_streamed:
+            recording_source = RecordingOpusAudio(audio_source, self.loop_buffer_max_bytes)
+            audio_source = recording_source
+
+        play_started_at = time.perf_counter()
+
+        def on_first_packet() -> None:
+            self.bot.loop.call_soon_threadsafe(self.record_first_packet, track, play_started_at, time.perf_counter(), is_repeat)
+
+        audio_source = TrackedAudio(audio_source, on_first_packet, is_streamed=is_streamed)
+        with self.bot.stage_timings.span("ready"):
+            await self.wait_until_ready(audio_source)
+        if not await self.start_playback(audio_source):
+            return
+
+        self.bot.title_index.add(track.title, track.url)
+
+        text_channel = self.bot.get_channel(track.text_channel_id)
+        if text_channel:
+            message = f"Now playing:\n{track.url}"
+            await text_channel.send(message)
+
+        await self.track_done_event.wait()
+
+        # A stream that ended early recorded only part of the track, so it is never kept as the loop buffer.
+        if self.is_interrupted(track, audio_source):
+            recording_source = None
+
+        retries = 0
+        while self.is_interrupted(track, audio_source) and retries < self.max_stream_retries:
+            retries += 1
+            logger.warning(f"Stream for {track.url} ended at {audio_source.position:.0f}s of {track.duration:.0f}s. Resuming...")
+            audio_source = await self.resume_source(track, audio_source.position)
+            if not audio_source:
+                break
+            await self.wait_until_ready(audio_source)
+            if not await self.start_playback(audio_source):
+                break
+            await self.track_done_event.wait()
+
+        if recording_source and recording_source.is_complete and recording_source.frames:
+            track.frames = recording_source.frames
+
+    async def wait_until_ready(self, audio_source: TrackedAudio) -> None:
+        is_voice_ready, is_source_ready = await asyncio.gather(
+            self.wait_for_voice(self.ready_timeout),
+            audio_source.prime(self.ready_timeout)
+        )
+        if not is_voice_ready:
+            logger.warning(f"Voice connection for guild {self.guild_id} not ready after {self.ready_timeout}s.")
+        if not is_source_ready:
+            logger.warning(f"Audio source for guild {self.guild_id} not ready after {self.ready_timeout}s.")
+
+    async def wait_for_voice(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            voice_client = self.voice_client
+            if voice_client and voice_client.is_connected():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+
+    async def start_playback(self, audio_source: discord.AudioSource) -> bool:
         self.track_done_event.clear()
 
         def after_callback(error: Exception | None) -> None:
             if error:
                 logger.error(error)
+                self.bot.playback_errors.inc(type(error).__name__)
+            # Called before the voice thread cleans up the source, so the FFmpeg process can still be inspected.
+            cpu_seconds = self.get_ffmpeg_cpu_seconds(audio_source)
+            if cpu_seconds is not None:
+                self.bot.loop.call_soon_threadsafe(self.record_ffmpeg_cpu, cpu_seconds)
             self.bot.loop.call_soon_threadsafe(self.track_done_event.set)
 
-        audio_source = await self.bot.music_fetcher.fetch_source(track.url)
-        if not audio_source:
-            text_channel = self.bot.get_channel(track.text_channel_id)
-            if text_channel:
-                message = self.bot.messages.get("error_source", "I couldn't find an audio source for that video.")
-                await text_channel.send(message)
-            return
-
-        await asyncio.sleep(3)
         async with self.lock:
             voice_client = self.voice_client
             if not voice_client or not voice_client.is_connected():
+                audio_source.cleanup()
                 self.track_done_event.set()
-                return
+                return False
 
             if voice_client.is_playing() or voice_client.is_paused():
                 voice_client.stop()
 
+            self.is_stopped = False
             voice_client.play(audio_source, after=after_callback)
+        return True
 
-        text_channel = self.bot.get_channel(track.text_channel_id)
-        if text_channel:
-            message = f"Now playing:\n{track.url}"
-            await text_channel.send(message)
+    @staticmethod
+    def get_ffmpeg_cpu_seconds(audio_source: discord.AudioSource) -> float | None:
+        process = getattr(unwrap_source(audio_source), "_process", None)
+        if not process:
+            return None
+        return get_process_cpu_seconds(process.pid)
 
-        await self.track_done_event.wait()
+    def record_ffmpeg_cpu(self, cpu_seconds: float) -> None:
+        self.bot.ffmpeg_cpu_seconds.inc(amount=cpu_seconds)
+        self.bot.stage_timings.observe("ffmpeg_cpu", cpu_seconds)
+
+    def is_interrupted(self, track: Track, audio_source: TrackedAudio) -> bool:
+        if self.is_stopped or self.shutdown_event.is_set() or not audio_source.is_streamed or not track.duration:
+            return False
+
+        voice_client = self.voice_client
+        if not voice_client or not voice_client.is_connected():
+            return False
+
+        # FFmpeg exits quietly when the signed URL is rejected mid-stream, so an early end is the only signal.
+        return audio_source.position < track.duration - self.stream_end_tolerance
+
+    async def resume_source(self, track: Track, position: float) -> TrackedAudio | None:
+        music_fetcher = self.bot.music_fetcher
+        info = await music_fetcher.refresh_info(track.url, self.guild_id, Priority.PLAYBACK)
+        if not info:
+            return None
+
+        track.info = info
+        source = music_fetcher.create_source(info, start_position=position)
+        if not source:
+            return None
+        return TrackedAudio(source, start_position=position, is_streamed=True)
+
+    def record_first_packet(self, track: Track, play_started_at: float, first_packet_at: float, is_repeat: bool) -> None:
+        stage_timings = self.bot.stage_timings
+        stage_timings.observe("first_packet", first_packet_at - play_started_at)
+        if not is_repeat and track.requested_at:
+            stage_timings.observe("time_to_play", first_packet_at - track.requested_at)
+
+    # ================================================================ #
+    # Prefetching                                                      #
+    # ================================================================ #
+    def schedule_prefetch(self) -> None:
+        if self.shutdown_event.is_set():
+            return
+
+        for track in islice(self.queue, self.prefetch_depth):
+            # Tasks are keyed by track identity; a pending task keeps its track alive, so ids cannot be reused.
+            track_id = id(track)
+            if track.source or track_id in self.prefetch_tasks:
+                continue
+            task = asyncio.create_task(self.prefetch_track(track), name=f"Prefetch_{self.guild_id}")
+            self.prefetch_tasks[track_id] = task
+            task.add_done_callback(lambda _, track_id=track_id: self.prefetch_tasks.pop(track_id, None))
+
+    async def prefetch_track(self, track: Track) -> None:
+        music_fetcher = self.bot.music_fetcher
+        try:
+            if not track.info or music_fetcher.is_expired(track.info):
+                track.info = await music_fetcher.fetch_info(track.url, self.guild_id, Priority.PREFETCH)
+            elif music_fetcher.needs_refresh(track.info):
+                track.info = await music_fetcher.refresh_info(track.url, self.guild_id, Priority.PREFETCH)
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            logger.exception(e)
+            return
+
+        if not self.warm_ffmpeg or not track.info or track.source:
+            return
+
+        # Only the track that plays next is warmed, and only while it is still queued.
+        if self.shutdown_event.is_set() or not self.queue or self.queue[0] is not track:
+            return
+
+        track.source = music_fetcher.create_source(track.info)
+
+    def cancel_prefetch(self) -> None:
+        for task in self.prefetch_tasks.values():
+            task.cancel()
+        self.prefetch_tasks.clear()
+
+        for track in self.queue:
+            if track.source:
+                track.source.cleanup()
+                track.source = None
 
     # ================================================================ #
     # State Inspectors                                                 #
@@ -98,9 +298,21 @@ class MusicPlayer:
     def is_queue_empty(self) -> bool:
         return not self.queue
 
+    def is_idle(self, timeout: float) -> bool:
+        return not self.current_track and not self.queue and time.monotonic() - self.last_active_at >= timeout
+
     def get_queue(self) -> list[Track]:
         return list(self.queue)
 
+    def get_queue_slice(self, start: int, stop: int) -> list[Track]:
+        return list(islice(self.queue, start, stop))
+
+    def get_snapshot_tracks(self) -> list[Track]:
+        tracks = list(self.queue)
+        if self.current_track:
+            tracks.insert(0, self.current_track)
+        return tracks
+
     # ================================================================ #
     # Playback Controllers                                             #
     # ================================================================ #
@@ -118,20 +330,29 @@ class MusicPlayer:
 
     async def stop(self) -> None:
         async with self.lock:
+            self.is_stopped = True
             voice_client = self.voice_client
             if voice_client and voice_client.is_connected():
                 voice_client.stop()
 
     def toggle_looping(self) -> None:
         self.is_looping = not self.is_looping
+        self.last_active_at = time.monotonic()
+        self.mark_dirty()
 
     # ================================================================ #
     # Queue Managers                                                   #
     # ================================================================ #
     async def enqueue(self, track: Track) -> None:
+        track.enqueued_at = time.perf_counter()
+        self.last_active_at = time.monotonic()
         async with self.queue_condition:
             self.queue.append(track)
+            self.queue_version += 1
+            self.queue_duration += track.duration or 0
             self.queue_condition.notify()
+        self.mark_dirty()
+        self.schedule_prefetch()
 
     async def skip(self) -> None:
         self.is_looping = False
@@ -139,11 +360,58 @@ class MusicPlayer:
 
     async def clear(self) -> None:
         async with self.queue_condition:
+            self.cancel_prefetch()
             self.queue.clear()
+            self.queue_version += 1
+            self.queue_duration = 0.0
+        self.mark_dirty()
+
+    # ================================================================ #
+    # Persistence                                                      #
+    # ================================================================ #
+    def mark_dirty(self) -> None:
+        # Until the stored queue has been restored, writing would overwrite it with this player's empty state.
+        if self.bot.queue_store and not self.needs_restore:
+            self.bot.queue_store.mark_dirty(self)
+
+    async def restore(self) -> None:
+        if not self.needs_restore:
+            return
+
+        self.needs_restore = False
+        if not self.bot.queue_store:
+            return
+
+        snapshot = await self.bot.queue_store.load(self.guild_id)
+        if not snapshot:
+            return
+
+        is_looping, tracks = snapshot
+        for track in tracks:
+            if track.info:
+                self.bot.music_fetcher.cache_info(track.url, track.info)
+
+        async with self.queue_condition:
+            self.is_looping = self.is_looping or is_looping
+            self.queue.extendleft(reversed(tracks))
+            self.queue_version += 1
+            self.queue_duration += sum(track.duration or 0 for track in tracks)
+            self.queue_condition.notify()
+        self.mark_dirty()
+        self.schedule_prefetch()
 
     # ================================================================ #
     # Shutdown                                                         #
     # ================================================================ #
+    async def suspend(self) -> None:
+        # The remaining state is written out first; needs_restore then stops shutdown's clear from overwriting it.
+        if self.bot.queue_store and not self.needs_restore:
+            self.bot.queue_store.mark_dirty(self)
+            await self.bot.queue_store.flush()
+        self.needs_restore = True
+        self.is_suspended = True
+        await self.shutdown()
+
     async def shutdown(self) -> None:
         self.is_looping = False
         await self.clear()
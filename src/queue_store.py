@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Iterable
+
+from models import Track
+
+if TYPE_CHECKING:
+    from music_player import MusicPlayer
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+INFO_KEYS = ("id", "title", "url", "duration", "acodec", "abr", "asr", "ext", "is_live", "http_headers")
+
+
+class QueueStore:
+    def __init__(self, file_path: str, flush_interval: float) -> None:
+        self.file_path = file_path
+        self.flush_interval = flush_interval
+        self.dirty: dict[int, "MusicPlayer"] = {}
+        self.lock = threading.Lock()
+        self.flush_lock = asyncio.Lock()
+        self.flush_task: asyncio.Task | None = None
+
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self.connection = sqlite3.connect(file_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS guild_queues ("
+            "guild_id INTEGER PRIMARY KEY, is_looping INTEGER NOT NULL, tracks TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.connection.commit()
+
+    # ================================================================ #
+    # Serialization                                                    #
+    # ================================================================ #
+    @staticmethod
+    def serialize_track(track: Track) -> dict:
+        info = {key: track.info[key] for key in INFO_KEYS if key in track.info} if track.info else None
+        return {
+            "url": track.url,
+            "title": track.title,
+            "text_channel_id": track.text_channel_id,
+            "duration": track.duration,
+            "info": info
+        }
+
+    @staticmethod
+    def deserialize_track(data: dict) -> Track:
+        return Track(
+            url=data["url"],
+            title=data["title"],
+            text_channel_id=data["text_channel_id"],
+            duration=data.get("duration"),
+            info=data.get("info")
+        )
+
+    # ================================================================ #
+    # Write-Behind                                                     #
+    # ================================================================ #
+    def start(self) -> None:
+        self.flush_task = asyncio.create_task(self.flush_periodically(), name="QueueStoreFlush")
+
+    def mark_dirty(self, music_player: "MusicPlayer") -> None:
+        self.dirty[music_player.guild_id] = music_player
+
+    async def flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self.dirty:
+            return
+
+        dirty, self.dirty = self.dirty, {}
+        await self.write_players(dirty.values())
+
+    async def write_players(self, music_players: "Iterable[MusicPlayer]") -> None:
+        # Snapshots are taken on the loop so they are consistent; encoding and disk I/O happen in a thread.
+        snapshots = []
+        for music_player in music_players:
+            tracks = [self.serialize_track(track) for track in music_player.get_snapshot_tracks()]
+            snapshots.append((music_player.guild_id, music_player.is_looping, tracks))
+
+        # Held across the write so a load never reads a row that an in-flight flush is replacing.
+        async with self.flush_lock:
+            try:
+                await asyncio.to_thread(self.write_snapshots, snapshots)
+            except Exception as e:
+                logger.exception(e)
+
+    def write_snapshots(self, snapshots: list[tuple[int, bool, list[dict]]]) -> None:
+        now = time.time()
+        upserts = []
+        deletes = []
+        for guild_id, is_looping, tracks in snapshots:
+            if tracks or is_looping:
+                upserts.append((guild_id, int(is_looping), json.dumps(tracks), now))
+            else:
+                deletes.append((guild_id,))
+
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO guild_queues (guild_id, is_looping, tracks, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(guild_id) DO UPDATE SET is_looping = excluded.is_looping, tracks = excluded.tracks, updated_at = excluded.updated_at",
+                upserts
+            )
+            self.connection.executemany("DELETE FROM guild_queues WHERE guild_id = ?", deletes)
+
+    # ================================================================ #
+    # Loading                                                          #
+    # ================================================================ #
+    async def load(self, guild_id: int) -> tuple[bool, list[Track]] | None:
+        # A pending write, such as the empty queue left by /leave, must land before the row is read back.
+        music_player = self.dirty.pop(guild_id, None)
+        if music_player:
+            await self.write_players([music_player])
+
+        async with self.flush_lock:
+            try:
+                row = await asyncio.to_thread(self.read_snapshot, guild_id)
+            except Exception as e:
+                logger.exception(e)
+                return None
+
+        if not row:
+            return None
+
+        is_looping, tracks = row
+        return bool(is_looping), [self.deserialize_track(data) for data in json.loads(tracks)]
+
+    async def delete(self, guild_id: int) -> None:
+        self.dirty.pop(guild_id, None)
+        async with self.flush_lock:
+            try:
+                await asyncio.to_thread(self.write_snapshots, [(guild_id, False, [])])
+            except Exception as e:
+                logger.exception(e)
+
+    def read_snapshot(self, guild_id: int) -> tuple[int, str] | None:
+        with self.lock:
+            cursor = self.connection.execute("SELECT is_looping, tracks FROM guild_queues WHERE guild_id = ?", (guild_id,))
+            return cursor.fetchone()
+
+    # ================================================================ #
+    # Shutdown                                                         #
+    # ================================================================ #
+    async def close(self) -> None:
+        if self.flush_task:
+            self.flush_task.cancel()
+        await self.flush()
+        with self.lock:
+            self.connection.close()
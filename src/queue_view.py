@@ -0,0 +1,92 @@
+from collections import deque
+import discord
+from itertools import islice
+from typing import TYPE_CHECKING
+
+from models import Track
+
+if TYPE_CHECKING:
+    from music_player import MusicPlayer
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes}:{seconds:02}"
+
+
+class StoredQueue:
+    # A queue read back from the queue store, shown without creating a player for the guild.
+    def __init__(self, bot, tracks: list[Track]) -> None:
+        self.bot = bot
+        self.queue: deque[Track] = deque(tracks)
+        self.queue_version: int = 0
+        self.queue_duration: float = sum(track.duration or 0 for track in tracks)
+        self.rendered_pages: dict[int, str] = {}
+        self.rendered_pages_version: int = 0
+
+    def is_queue_empty(self) -> bool:
+        return not self.queue
+
+    def get_queue_slice(self, start: int, stop: int) -> list[Track]:
+        return list(islice(self.queue, start, stop))
+
+
+class QueueView(discord.ui.View):
+    def __init__(self, music_player: "MusicPlayer | StoredQueue", page_size: int) -> None:
+        super().__init__(timeout=180)
+        self.music_player = music_player
+        self.page_size = page_size
+        self.page: int = 0
+        self.update_buttons()
+
+    def get_page_count(self) -> int:
+        return max(1, -(-len(self.music_player.queue) // self.page_size))
+
+    def render_page(self) -> str:
+        music_player = self.music_player
+        if music_player.rendered_pages_version != music_player.queue_version:
+            music_player.rendered_pages.clear()
+            music_player.rendered_pages_version = music_player.queue_version
+
+        self.page = min(self.page, self.get_page_count() - 1)
+        message = music_player.rendered_pages.get(self.page)
+        if message is not None:
+            return message
+
+        if not music_player.queue:
+            message = music_player.bot.messages.event_queue_empty
+            music_player.rendered_pages[self.page] = message
+            return message
+
+        start = self.page * self.page_size
+        lines = [f"__Queue__ ({len(music_player.queue)} tracks, ~{format_duration(music_player.queue_duration)})"]
+        for index, track in enumerate(music_player.get_queue_slice(start, start + self.page_size), start=start + 1):
+            duration = f" ({format_duration(track.duration)})" if track.duration else ""
+            lines.append(f"{index}. `{track.title}`{duration}")
+        lines.append(f"Page {self.page + 1}/{self.get_page_count()}")
+
+        message = "\n".join(lines)
+        music_player.rendered_pages[self.page] = message
+        return message
+
+    def update_buttons(self) -> None:
+        page_count = self.get_page_count()
+        self.page = min(self.page, page_count - 1)
+        self.previous_button.disabled = self.page == 0
+        self.next_button.disabled = self.page >= page_count - 1
+
+    async def show_page(self, interaction: discord.Interaction, page: int) -> None:
+        self.page = page
+        self.update_buttons()
+        await interaction.response.edit_message(content=self.render_page(), view=self)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        await self.show_page(interaction, max(0, self.page - 1))
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        await self.show_page(interaction, self.page + 1)
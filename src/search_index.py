@@ -0,0 +1,60 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+import re
+
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def normalize_words(text: str) -> list[str]:
+    return WORD_PATTERN.findall(text.casefold())
+
+
+class TitleIndex:
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.titles: OrderedDict[str, str] = OrderedDict()
+        self.words: list[tuple[str, str]] = []
+
+    def add(self, title: str, url: str) -> None:
+        if url in self.titles:
+            self.titles.move_to_end(url)
+            return
+
+        self.titles[url] = title
+        for word in set(normalize_words(title)):
+            insort(self.words, (word, url))
+
+        while len(self.titles) > self.max_size:
+            old_url, old_title = self.titles.popitem(last=False)
+            for word in set(normalize_words(old_title)):
+                index = bisect_left(self.words, (word, old_url))
+                if index < len(self.words) and self.words[index] == (word, old_url):
+                    del self.words[index]
+
+    def search(self, query: str, limit: int) -> list[tuple[str, str]]:
+        query_words = normalize_words(query)
+        if not query_words:
+            return []
+
+        # The last word is usually still being typed, so it is matched as a prefix; the others must appear whole.
+        prefix = query_words[-1]
+        complete_words = set(query_words[:-1])
+        results = []
+        index = bisect_left(self.words, (prefix, ""))
+        seen = set()
+        while index < len(self.words) and len(results) < limit:
+            word, url = self.words[index]
+            if not word.startswith(prefix):
+                break
+            index += 1
+
+            if url in seen:
+                continue
+            seen.add(url)
+
+            title = self.titles[url]
+            if complete_words.issubset(normalize_words(title)):
+                results.append((title, url))
+
+        return results
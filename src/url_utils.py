@@ -0,0 +1,74 @@
+import re
+from urllib.parse import parse_qs, urlparse
+
+
+VIDEO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{11}$")
+PLAYLIST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{2,64}$")
+YOUTUBE_HOSTS = {"youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com", "youtube-nocookie.com", "www.youtube-nocookie.com"}
+SHORT_HOSTS = {"youtu.be", "www.youtu.be"}
+VIDEO_PATH_PREFIXES = ("shorts", "embed", "live", "v")
+
+
+def is_url(text: str) -> bool:
+    return urlparse(text).scheme in ("http", "https") or text.startswith(("www.", "m.", "youtube.com", "youtu.be", "music.youtube.com"))
+
+
+def parse_url(url: str):
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    return urlparse(url)
+
+
+def parse_video_id(url: str) -> str | None:
+    parsed_url = parse_url(url)
+    host = (parsed_url.hostname or "").lower()
+    path_parts = [part for part in parsed_url.path.split("/") if part]
+
+    video_id = None
+    if host in SHORT_HOSTS:
+        video_id = path_parts[0] if path_parts else None
+    elif host in YOUTUBE_HOSTS:
+        if path_parts == ["watch"]:
+            video_id = parse_qs(parsed_url.query).get("v", [None])[0]
+        elif len(path_parts) >= 2 and path_parts[0] in VIDEO_PATH_PREFIXES:
+            video_id = path_parts[1]
+
+    if video_id and VIDEO_ID_PATTERN.match(video_id):
+        return video_id
+    return None
+
+
+def parse_playlist_id(url: str) -> str | None:
+    parsed_url = parse_url(url)
+    host = (parsed_url.hostname or "").lower()
+    path = parsed_url.path.rstrip("/")
+    query = parse_qs(parsed_url.query)
+    if host not in YOUTUBE_HOSTS or not (path == "/playlist" or (path == "/watch" and "v" not in query)):
+        return None
+
+    playlist_id = query.get("list", [None])[0]
+    if playlist_id and PLAYLIST_ID_PATTERN.match(playlist_id):
+        return playlist_id
+    return None
+
+
+def canonicalize_url(url: str) -> str | None:
+    # A watch URL that also carries &list= plays just the video, matching noplaylist.
+    video_id = parse_video_id(url)
+    if video_id:
+        return f"https://www.youtube.com/watch?v={video_id}"
+
+    playlist_id = parse_playlist_id(url)
+    if playlist_id:
+        return f"https://www.youtube.com/playlist?list={playlist_id}"
+
+    return None
+
+
+def is_playlist_url(url: str) -> bool:
+    return parse_playlist_id(url) is not None
+
+
+def get_video_id(url: str) -> str:
+    return parse_video_id(url) or url.strip()
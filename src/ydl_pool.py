@@ -0,0 +1,81 @@
+from contextlib import contextmanager
+import queue
+import threading
+from typing import TYPE_CHECKING, Iterator
+
+# yt-dlp takes a noticeable fraction of startup to import, so it is loaded with the first instance.
+if TYPE_CHECKING:
+    import yt_dlp
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class YoutubeDLPool:
+    def __init__(self, options: dict, size: int, max_uses: int) -> None:
+        self.options = options
+        self.size = size
+        self.max_uses = max_uses
+        self.idle: queue.LifoQueue[tuple["yt_dlp.YoutubeDL", int]] = queue.LifoQueue()
+        self.created: int = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def lease(self) -> Iterator["yt_dlp.YoutubeDL"]:
+        ydl, uses = self.acquire()
+        failed = False
+        try:
+            yield ydl
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(ydl, uses + 1, failed)
+
+    def create_instance(self) -> "yt_dlp.YoutubeDL":
+        import yt_dlp
+        return yt_dlp.YoutubeDL(self.options)
+
+    def acquire(self) -> tuple["yt_dlp.YoutubeDL", int]:
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            can_create = self.created < self.size
+            if can_create:
+                self.created += 1
+
+        if can_create:
+            return self.create_instance(), 0
+        return self.idle.get()
+
+    def release(self, ydl: "yt_dlp.YoutubeDL", uses: int, failed: bool) -> None:
+        if not failed and uses < self.max_uses:
+            self.idle.put((ydl, uses))
+            return
+
+        self.close_instance(ydl)
+        with self.lock:
+            self.created -= 1
+
+        # Replace the recycled instance so a thread blocked in acquire() is not left waiting.
+        if self.idle.empty():
+            self.idle.put((self.create_instance(), 0))
+            with self.lock:
+                self.created += 1
+
+    def close_instance(self, ydl: "yt_dlp.YoutubeDL") -> None:
+        try:
+            ydl.close()
+        except Exception as e:
+            logger.exception(e)
+
+    def close(self) -> None:
+        while True:
+            try:
+                ydl, _ = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self.close_instance(ydl)